@@ -0,0 +1,791 @@
+import asyncio
+import base64
+import io
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework import serializers
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from foodgram.middleware import RequestMetricsMiddleware
+from foodgram.constants import (
+    BENCHMARK_BULK_SIZE,
+    BENCHMARK_EMAIL_DOMAIN,
+    BENCHMARK_MIN_SAMPLES,
+    BENCHMARK_NOISE_MS,
+    BENCHMARK_PASSWORD,
+    BENCHMARK_TOKENS,
+    BULK_ADDED,
+)
+from api.pagination import KeysetPagination, LimitPagination
+from api.serializers import (
+    IngredientSerializer,
+    RecipeGetSerializer,
+    TagSerializer,
+    UserSerializer,
+)
+from foodgram.images import get_variant_url, get_variant_urls
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Subscription,
+    Tag,
+)
+from recipes.search import ingredient_index
+from shortener.models import LinkMapped
+from users.models import User
+
+
+def make_image():
+    """ Небольшое изображение в base64 для запросов на запись. """
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Dataset:
+    """ Идентификаторы синтетических данных, из которых
+    собираются запросы нагрузочного теста.
+    """
+
+    def __init__(self):
+        users = User.objects.filter(
+            email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}').order_by('id')
+        self.user_ids = list(users.values_list('id', flat=True))
+        if len(self.user_ids) < 2:
+            raise ValueError(
+                'Нет синтетических данных, выполните seed_benchmark.')
+        self.recipe_ids = list(Recipe.objects.filter(
+            author_id__in=self.user_ids).values_list('id', flat=True))
+        self.tag_slugs = list(Tag.objects.values_list('slug', flat=True))
+        self.tag_ids = list(Tag.objects.values_list('id', flat=True))
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)[:1000])
+        self.prefixes = sorted({
+            name[:2] for name in Ingredient.objects.values_list(
+                'name', flat=True)[:1000]
+        })
+        self.words = sorted({
+            name.split()[0] for name in Recipe.objects.filter(
+                id__in=self.recipe_ids[:500]).values_list('name', flat=True)
+        })
+        self.login_email = users.values_list('email', flat=True).first()
+        self.tokens = {
+            user_id: Token.objects.get_or_create(user_id=user_id)[0].key
+            for user_id in self.user_ids[1:BENCHMARK_TOKENS + 1]
+        }
+        self.short_hashes = [
+            LinkMapped.objects.create_link(
+                f'http://testserver/recipes/{recipe_id}').url_hash
+            for recipe_id in self.recipe_ids[:20]
+        ]
+        self.image = make_image()
+
+
+class TrafficMix:
+    """ Сценарии запросов с весами, приближенными к реальному
+    трафику: в основном чтение, запись - парами, которые
+    возвращают данные в исходное состояние.
+    """
+
+    scenarios = (
+        ('recipe_list', 20),
+        ('recipe_list_user', 15),
+        ('recipe_filter_tags', 5),
+        ('recipe_filter_author', 4),
+        ('recipe_favorited', 3),
+        ('recipe_in_cart', 2),
+        ('recipe_search', 3),
+        ('recipe_detail', 15),
+        ('recipe_get_link', 2),
+        ('short_link', 3),
+        ('tags', 5),
+        ('ingredients', 7),
+        ('users', 4),
+        ('users_me', 5),
+        ('subscriptions', 3),
+        ('download_shopping_cart', 1),
+        ('favorite', 2),
+        ('shopping_cart', 2),
+        ('favorite_bulk', 0.5),
+        ('shopping_cart_bulk', 0.5),
+        ('subscribe', 1),
+        ('recipe_write', 1),
+        ('avatar', 0.5),
+        ('login', 0.2),
+    )
+
+    def __init__(self, dataset, rng):
+        self.data = dataset
+        self.rng = rng
+
+    def pick(self):
+        names, weights = zip(*self.scenarios)
+        return getattr(self, self.rng.choices(names, weights)[0])
+
+    def user(self):
+        return self.rng.choice(list(self.data.tokens))
+
+    def recipe(self):
+        return self.rng.choice(self.data.recipe_ids)
+
+    def recipe_list(self, call):
+        call('recipe-list', 'get', '/api/recipes/',
+             {'page': self.rng.randint(1, 20), 'limit': 6})
+
+    def recipe_list_user(self, call):
+        call('recipe-list-auth', 'get', '/api/recipes/',
+             {'page': self.rng.randint(1, 5), 'limit': 6}, user=self.user())
+
+    def recipe_filter_tags(self, call):
+        call('recipe-list-tags', 'get', '/api/recipes/',
+             {'tags': self.rng.sample(self.data.tag_slugs, 2), 'limit': 6})
+
+    def recipe_filter_author(self, call):
+        call('recipe-list-author', 'get', '/api/recipes/',
+             {'author': self.rng.choice(self.data.user_ids), 'limit': 6})
+
+    def recipe_favorited(self, call):
+        call('recipe-list-favorited', 'get', '/api/recipes/',
+             {'is_favorited': 1, 'limit': 6}, user=self.user())
+
+    def recipe_in_cart(self, call):
+        call('recipe-list-in-cart', 'get', '/api/recipes/',
+             {'is_in_shopping_cart': 1, 'limit': 6}, user=self.user())
+
+    def recipe_search(self, call):
+        call('recipe-list-search', 'get', '/api/recipes/',
+             {'search': self.rng.choice(self.data.words), 'limit': 6})
+
+    def recipe_detail(self, call):
+        user = self.user() if self.rng.random() < 0.5 else None
+        call('recipe-detail', 'get', f'/api/recipes/{self.recipe()}/',
+             user=user)
+
+    def recipe_get_link(self, call):
+        call('recipe-get-link', 'get',
+             f'/api/recipes/{self.recipe()}/get-link/')
+
+    def short_link(self, call):
+        call('short-link', 'get',
+             f'/s/{self.rng.choice(self.data.short_hashes)}/')
+
+    def tags(self, call):
+        call('tag-list', 'get', '/api/tags/')
+
+    def ingredients(self, call):
+        call('ingredient-list', 'get', '/api/ingredients/',
+             {'name': self.rng.choice(self.data.prefixes)})
+        call('ingredient-detail', 'get',
+             f'/api/ingredients/{self.rng.choice(self.data.ingredient_ids)}/')
+
+    def users(self, call):
+        call('users-list', 'get', '/api/users/',
+             {'page': self.rng.randint(1, 10), 'limit': 6})
+        call('users-detail', 'get',
+             f'/api/users/{self.rng.choice(self.data.user_ids)}/',
+             user=self.user())
+
+    def users_me(self, call):
+        call('users-me', 'get', '/api/users/me/', user=self.user())
+
+    def subscriptions(self, call):
+        call('users-subscriptions', 'get', '/api/users/subscriptions/',
+             {'limit': 6, 'recipes_limit': 3}, user=self.user())
+
+    def download_shopping_cart(self, call):
+        call('recipe-download-shopping-cart', 'get',
+             '/api/recipes/download_shopping_cart/', user=self.user())
+
+    def paired(self, call, name, path, user):
+        """ Добавление и удаление; если связь уже была, она
+        восстанавливается, чтобы данные не менялись от прогона к прогону.
+        """
+        if call(f'{name}-add', 'post', path, user=user) == 201:
+            call(f'{name}-remove', 'delete', path, user=user)
+        else:
+            call(f'{name}-remove', 'delete', path, user=user)
+            call(f'{name}-add', 'post', path, user=user)
+
+    def favorite(self, call):
+        self.paired(call, 'recipe-favorite',
+                    f'/api/recipes/{self.recipe()}/favorite/', self.user())
+
+    def shopping_cart(self, call):
+        self.paired(call, 'recipe-shopping-cart',
+                    f'/api/recipes/{self.recipe()}/shopping_cart/',
+                    self.user())
+
+    def bulk(self, call, name, path):
+        """ Массовое добавление и удаление только добавленных
+        рецептов: уже связанные рецепты остаются на месте.
+        """
+        user = self.user()
+        recipes = self.rng.sample(self.data.recipe_ids, BENCHMARK_BULK_SIZE)
+        status, body = call(f'{name}-add', 'post', path,
+                            {'recipes': recipes}, user=user, body=True)
+        if status != 200:
+            return
+        added = [
+            result['id'] for result in body['results']
+            if result['status'] == BULK_ADDED
+        ]
+        if added:
+            call(f'{name}-remove', 'delete', path, {'recipes': added},
+                 user=user)
+
+    def favorite_bulk(self, call):
+        self.bulk(call, 'recipe-favorite-bulk', '/api/recipes/favorite/')
+
+    def shopping_cart_bulk(self, call):
+        self.bulk(call, 'recipe-shopping-cart-bulk',
+                  '/api/recipes/shopping_cart/')
+
+    def subscribe(self, call):
+        user = self.user()
+        author = self.rng.choice(self.data.user_ids)
+        if author != user:
+            self.paired(call, 'users-subscribe',
+                        f'/api/users/{author}/subscribe/', user)
+
+    def recipe_write(self, call):
+        user = self.user()
+        data = {
+            'name': 'Нагрузочный рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': self.data.image,
+            'tags': self.rng.sample(self.data.tag_ids, 2),
+            'ingredients': [
+                {'id': pk, 'amount': 10}
+                for pk in self.rng.sample(self.data.ingredient_ids, 5)
+            ],
+        }
+        status, body = call('recipe-create', 'post', '/api/recipes/',
+                            data, user=user, body=True)
+        if status != 201:
+            return
+        data['ingredients'] = data['ingredients'][1:]
+        data['cooking_time'] = 20
+        path = f'/api/recipes/{body["id"]}/'
+        call('recipe-update', 'patch', path, data, user=user)
+        call('recipe-delete', 'delete', path, user=user)
+
+    def avatar(self, call):
+        user = self.user()
+        call('users-avatar-put', 'put', '/api/users/me/avatar/',
+             {'avatar': self.data.image}, user=user)
+        call('users-avatar-delete', 'delete', '/api/users/me/avatar/',
+             user=user)
+
+    def login(self, call):
+        status, body = call(
+            'token-login', 'post', '/api/auth/token/login/',
+            {'email': self.data.login_email, 'password': BENCHMARK_PASSWORD},
+            body=True)
+        if status == 200:
+            call('token-logout', 'post', '/api/auth/token/logout/',
+                 token=body['auth_token'])
+
+
+class BenchmarkRunner:
+    """ Прогоняет сценарии через тестовый клиент Django в нескольких
+    потоках и собирает время и число SQL-запросов каждого запроса.
+    """
+
+    def __init__(self, dataset, requests, concurrency, seed):
+        self.dataset = dataset
+        self.requests = requests
+        self.concurrency = concurrency
+        self.seed = seed
+        self.results = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+        self.done = 0
+
+    def worker(self, number):
+        client = Client()
+        mix = TrafficMix(self.dataset, random.Random(self.seed + number))
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        def call(name, method, path, data=None, user=None, token=None,
+                 body=False):
+            token = token or self.dataset.tokens.get(user)
+            headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+            if method != 'get':
+                headers['content_type'] = 'application/json'
+                data = '' if data is None else data
+            queries.clear()
+            started = time.perf_counter()
+            with connection.execute_wrapper(count_queries):
+                response = getattr(client, method)(path, data, **headers)
+                if response.streaming:
+                    # Потоковый ответ выполняет запросы при чтении.
+                    b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.results[name].append((elapsed, len(queries)))
+                if response.status_code >= 500:
+                    self.errors[name] += 1
+                self.done += 1
+            if body:
+                return response.status_code, response.json()
+            return response.status_code
+
+        try:
+            while True:
+                with self.lock:
+                    if self.done >= self.requests:
+                        return
+                mix.pick()(call)
+        finally:
+            connection.close()
+
+    def run(self):
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self.worker, args=(number,))
+            for number in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        routes = {}
+        for name, samples in sorted(self.results.items()):
+            times = sorted(elapsed * 1000 for elapsed, _ in samples)
+            routes[name] = {
+                'count': len(samples),
+                'p50': round(percentile(times, 0.5), 2),
+                'p95': round(percentile(times, 0.95), 2),
+                'p99': round(percentile(times, 0.99), 2),
+                'queries': round(
+                    sum(count for _, count in samples) / len(samples), 2),
+                'errors': self.errors[name],
+            }
+        times = sorted(
+            elapsed * 1000
+            for samples in self.results.values()
+            for elapsed, _ in samples
+        )
+        return {
+            'requests': len(times),
+            'throughput': round(len(times) / elapsed, 1),
+            'p50': round(percentile(times, 0.5), 2),
+            'p95': round(percentile(times, 0.95), 2),
+            'p99': round(percentile(times, 0.99), 2),
+            'routes': routes,
+        }
+
+
+class HttpLoad:
+    """ Нагрузка на запущенный сервер по HTTP/1.1 с keep-alive:
+    каждый из concurrency клиентов в течение duration секунд
+    по кругу запрашивает пути только на чтение. В отличие от
+    BenchmarkRunner проходит весь стек сервера, поэтому подходит
+    для сравнения WSGI и ASGI.
+    """
+
+    def __init__(self, host, port, paths, concurrency, duration, token=None):
+        self.host = host
+        self.port = port
+        self.paths = paths
+        self.concurrency = concurrency
+        self.duration = duration
+        self.token = token
+        self.times = []
+        self.errors = 0
+
+    def build_request(self, path):
+        lines = [f'GET {path} HTTP/1.1', f'Host: {self.host}']
+        if self.token:
+            lines.append(f'Authorization: Token {self.token}')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+    @staticmethod
+    async def read_response(reader):
+        """ Читает ответ целиком; возвращает статус и признак
+        закрытия соединения сервером.
+        """
+        head = await reader.readuntil(b'\r\n\r\n')
+        status = int(head.split(b' ', 2)[1])
+        headers = {}
+        for line in head.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if headers.get(b'transfer-encoding') == b'chunked':
+            while True:
+                size = int((await reader.readline()).strip(), 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif b'content-length' in headers:
+            await reader.readexactly(int(headers[b'content-length']))
+        else:
+            await reader.read()
+            return status, True
+        return status, headers.get(b'connection') == b'close'
+
+    async def client(self, number):
+        writer = None
+        deadline = time.perf_counter() + self.duration
+        while time.perf_counter() < deadline:
+            path = self.paths[number % len(self.paths)]
+            number += 1
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(
+                        self.host, self.port)
+                started = time.perf_counter()
+                writer.write(self.build_request(path))
+                status, closed = await self.read_response(reader)
+                self.times.append(time.perf_counter() - started)
+                if status >= 400:
+                    self.errors += 1
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                self.errors += 1
+                closed = True
+            if closed and writer is not None:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    async def gather(self):
+        await asyncio.gather(*(
+            self.client(number) for number in range(self.concurrency)))
+
+    def run(self):
+        asyncio.run(self.gather())
+        times = sorted(elapsed * 1000 for elapsed in self.times)
+        if not times:
+            raise ValueError('Сервер не ответил ни на один запрос.')
+        return {
+            'requests': len(times),
+            'throughput': round(len(times) / self.duration, 1),
+            'p50': round(percentile(times, 0.5), 2),
+            'p95': round(percentile(times, 0.95), 2),
+            'p99': round(percentile(times, 0.99), 2),
+            'errors': self.errors,
+        }
+
+
+def read_paths(dataset, rng, count):
+    """ Пути смеси чтения для HttpLoad: списки и карточки рецептов,
+    теги и поиск ингредиентов.
+    """
+    makers = (
+        lambda: f'/api/recipes/?limit=6&page={rng.randint(1, 20)}',
+        lambda: f'/api/recipes/{rng.choice(dataset.recipe_ids)}/',
+        lambda: '/api/tags/',
+        lambda: f'/api/ingredients/?name={rng.choice(dataset.prefixes)}',
+    )
+    return [makers[index % len(makers)]() for index in range(count)]
+
+
+def compare(report, baseline, tolerance):
+    """ Список регрессий относительно сохраненного базового прогона.
+    Число SQL-запросов сравнивается точно, время - с допуском:
+    по маршрутам медиана, по всему прогону p95 и пропускная способность.
+    """
+    regressions = []
+    if report['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append(
+            f'пропускная способность {report["throughput"]} '
+            f'< {baseline["throughput"]} запросов/с')
+    if is_slower(report['p95'], baseline['p95'], tolerance):
+        regressions.append(f'p95 {report["p95"]} > {baseline["p95"]} мс')
+    for name, route in report['routes'].items():
+        base = baseline['routes'].get(name)
+        if base is None:
+            continue
+        if route['queries'] > base['queries'] + 0.5:
+            regressions.append(
+                f'{name}: SQL-запросов {route["queries"]} '
+                f'> {base["queries"]}')
+        if (min(route['count'], base['count']) >= BENCHMARK_MIN_SAMPLES
+                and is_slower(route['p50'], base['p50'], tolerance)):
+            regressions.append(
+                f'{name}: p50 {route["p50"]} > {base["p50"]} мс')
+        if route['errors'] > base['errors']:
+            regressions.append(f'{name}: ошибок {route["errors"]}')
+    return regressions
+
+
+def is_slower(value, baseline, tolerance):
+    return (value > baseline * (1 + tolerance)
+            and value - baseline > BENCHMARK_NOISE_MS)
+
+
+PATH_BENCHMARKS = {}
+
+
+def path_benchmark(name):
+    """ Регистрирует сравнение двух реализаций одного пути. Функция
+    получает параметры команды и возвращает пары (название, вызов).
+    """
+    def decorator(func):
+        PATH_BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def measure(func, repeat):
+    """ Медиана времени одного вызова в мс и число SQL-запросов. """
+    queries = []
+
+    def count_queries(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    func()
+    times = []
+    for _ in range(repeat):
+        queries.clear()
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            func()
+        times.append((time.perf_counter() - started) * 1000)
+    return round(percentile(sorted(times), 0.5), 3), len(queries)
+
+
+def make_request(path, user=None):
+    request = Request(APIRequestFactory().get(path))
+    request.user = user or AnonymousUser()
+    return request
+
+
+class FieldIngredientSerializer(serializers.ModelSerializer):
+    """ Ингредиент рецепта из связанных объектов, как до карточек. """
+
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit')
+
+    class Meta:
+        model = IngredientRecipe
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class FieldRecipeSerializer(serializers.ModelSerializer):
+    """ Рецепт, собранный по полям из автора, тегов и ингредиентов,
+    как до карточек; для сравнения с RecipeGetSerializer.
+    """
+
+    tags = TagSerializer(many=True, read_only=True)
+    author = UserSerializer(read_only=True)
+    image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    ingredients = FieldIngredientSerializer(
+        many=True, read_only=True, source='amount_ingredients')
+    is_favorited = serializers.ReadOnlyField()
+    is_in_shopping_cart = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'id',
+            'tags',
+            'author',
+            'ingredients',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'name',
+            'image',
+            'image_variants',
+            'text',
+            'cooking_time',
+        )
+
+    def get_image(self, obj):
+        return get_variant_url(
+            obj.image, obj.image_variants, 'card', self.context['request'])
+
+    def get_image_variants(self, obj):
+        return get_variant_urls(
+            obj.image, obj.image_variants, self.context['request'])
+
+
+def with_related_fields(user):
+    """ Запрос рецептов до карточек: теги, ингредиенты и автор с
+    флагом подписки подгружаются отдельными запросами.
+    """
+    if not user.is_authenticated:
+        false = Value(False)
+        authors = User.objects.annotate(is_subscribed=false)
+        flags = {'is_favorited': false, 'is_in_shopping_cart': false}
+    else:
+        authors = User.objects.annotate(is_subscribed=Exists(
+            Subscription.objects.filter(user=user, author=OuterRef('pk'))))
+        flags = {
+            'is_favorited': Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            'is_in_shopping_cart': Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        }
+    return Recipe.objects.prefetch_related(
+        'tags',
+        Prefetch(
+            'amount_ingredients',
+            queryset=IngredientRecipe.objects.select_related(
+                'ingredient').order_by('pk')
+        ),
+        Prefetch('author', queryset=authors),
+    ).annotate(**flags)
+
+
+@path_benchmark('recipe_serializers')
+def recipe_serializers(options):
+    """ Страница рецептов от пользователя: сборка по полям из
+    with_related_fields() и готовые карточки из with_cards().
+    Замер включает запросы к базе.
+    """
+    user = User.objects.filter(
+        email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}').first()
+    request = make_request('/api/recipes/', user)
+    context = {'request': request}
+    limit = options['limit']
+
+    def fields():
+        return FieldRecipeSerializer(
+            with_related_fields(request.user)[:limit], many=True,
+            context=context).data
+
+    def cards():
+        return RecipeGetSerializer(
+            Recipe.objects.with_cards(request.user)[:limit], many=True,
+            context=context).data
+
+    return (
+        ('по полям, with_related_fields', fields),
+        ('карточки, with_cards', cards),
+    )
+
+
+@path_benchmark('metrics')
+def metrics(options):
+    """ Стоимость замеров запроса: RequestMetricsMiddleware вокруг
+    пустого представления и полный запрос списка рецептов
+    от пользователя (ответ не кэшируется) с замерами и без них.
+    """
+    middleware = 'foodgram.middleware.RequestMetricsMiddleware'
+    factory = RequestFactory()
+
+    def empty_view(request):
+        return HttpResponse()
+
+    def call_empty(handler):
+        request = factory.get('/api/tags/')
+        request.resolver_match = None
+        return handler(request)
+
+    token = Token.objects.values_list('key', flat=True).first()
+    headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+    path = f'/api/recipes/?limit={options["limit"]}'
+    clients = {}
+    for label, stack in (
+        ('с замерами', settings.MIDDLEWARE),
+        ('без замеров', [
+            name for name in settings.MIDDLEWARE if name != middleware]),
+    ):
+        with override_settings(MIDDLEWARE=stack):
+            client = clients[label] = Client(**headers)
+            # Цепочка middleware собирается при первом запросе.
+            client.get(path)
+    return (
+        ('пустое представление', lambda: call_empty(empty_view)),
+        ('пустое представление с замерами',
+         lambda: call_empty(RequestMetricsMiddleware(empty_view))),
+        *(
+            (f'{label}, {path}', lambda client=client: client.get(path))
+            for label, client in clients.items()
+        ),
+    )
+
+
+@path_benchmark('ingredients')
+def ingredients(options):
+    """ Автодополнение ингредиентов по всем двухбуквенным префиксам:
+    индекс в памяти и прежний запрос ILIKE 'x%' через ORM.
+    """
+    prefixes = sorted({
+        name[:2] for name in Ingredient.objects.values_list(
+            'name', flat=True)
+    })
+
+    def search_index():
+        for prefix in prefixes:
+            IngredientSerializer(
+                ingredient_index.search(prefix), many=True).data
+
+    def search_orm():
+        for prefix in prefixes:
+            IngredientSerializer(
+                Ingredient.objects.filter(name__istartswith=prefix),
+                many=True).data
+
+    return (
+        (f'index, {len(prefixes)} префиксов', search_index),
+        (f'ORM, {len(prefixes)} префиксов', search_orm),
+    )
+
+
+@path_benchmark('pagination')
+def pagination(options):
+    """ Первая и глубокая страница списка рецептов: OFFSET с COUNT(*)
+    и курсор. Глубокая страница - --page или последняя, если рецептов
+    меньше.
+    """
+    limit = options['limit']
+    queryset = Recipe.objects.with_cards(AnonymousUser())
+    last_page = max(1, -(-queryset.count() // limit))
+    deep_page = min(options['page'], last_page)
+    position = queryset.values_list('id', flat=True)[
+        (deep_page - 1) * limit]
+    keyset = KeysetPagination()
+    keyset.base_url = 'http://testserver/api/recipes/'
+    deep_cursor = keyset.encode_cursor(
+        Cursor(offset=0, reverse=False, position=str(position + 1)))
+
+    def paginate(url):
+        request = make_request(url)
+        return lambda: list(
+            LimitPagination().paginate_queryset(queryset, request))
+
+    return (
+        ('OFFSET, страница 1', paginate(f'/?limit={limit}')),
+        (f'OFFSET, страница {deep_page}',
+         paginate(f'/?limit={limit}&page={deep_page}')),
+        ('курсор, страница 1', paginate(f'/?limit={limit}&cursor=')),
+        (f'курсор, страница {deep_page}',
+         paginate(f'{deep_cursor}&limit={limit}')),
+    )
@@ -0,0 +1,144 @@
+import binascii
+import re
+import uuid
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image
+from rest_framework import serializers
+
+from foodgram.constants import (
+    IMAGE_DECODE_CHUNK_SIZE,
+    IMAGE_MAX_BYTES,
+    IMAGE_MAX_HEIGHT,
+    IMAGE_MAX_WIDTH,
+    MESSAGE_IMAGE_DIMENSIONS,
+    MESSAGE_IMAGE_INVALID,
+    MESSAGE_IMAGE_SIZE,
+    MESSAGE_IMAGE_TYPE,
+)
+
+IMAGE_SIGNATURES = {
+    'jpg': (b'\xff\xd8\xff',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'gif': (b'GIF87a', b'GIF89a'),
+    'webp': (b'RIFF',),
+}
+BASE64_RE = re.compile(r'[A-Za-z0-9+/]*={0,2}')
+WHITESPACE_RE = re.compile(r'\s+')
+IMAGE_CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+
+def guess_extension(head):
+    """ Формат изображения по первым байтам файла. """
+    for extension, signatures in IMAGE_SIGNATURES.items():
+        if head.startswith(signatures):
+            if extension == 'webp' and head[8:12] != b'WEBP':
+                continue
+            return extension
+    return None
+
+
+class CloseUploadsMixin:
+    """ Закрывает временные файлы после сохранения. Хранилище
+    перемещает их в MEDIA_ROOT, поэтому закрыть нужно явно.
+    """
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            for value in self.validated_data.values():
+                if isinstance(value, TemporaryUploadedFile):
+                    value.close()
+
+
+class StreamingBase64ImageField(serializers.ImageField):
+    """ Изображение в base64, которое декодируется частями
+    во временный файл на диске. Размер проверяется по длине строки
+    до декодирования, формат - по первому блоку, размеры в пикселях -
+    по заголовку, до того как Pillow разожмет изображение.
+    """
+
+    def __init__(self, *args, max_bytes=IMAGE_MAX_BYTES,
+                 max_width=IMAGE_MAX_WIDTH, max_height=IMAGE_MAX_HEIGHT,
+                 **kwargs):
+        self.max_bytes = max_bytes
+        self.max_width = max_width
+        self.max_height = max_height
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if data in ('', None):
+            return None
+        if not isinstance(data, str):
+            raise serializers.ValidationError(MESSAGE_IMAGE_INVALID)
+        start = data.find(';base64,')
+        start = 0 if start == -1 else start + len(';base64,')
+        if (len(data) - start) // 4 * 3 > self.max_bytes:
+            raise serializers.ValidationError(MESSAGE_IMAGE_SIZE.format(
+                size=self.max_bytes // (1024 * 1024)))
+        file = self.decode(data, start)
+        try:
+            self.check_dimensions(file)
+            return super().to_internal_value(file)
+        except Exception:
+            file.close()
+            raise
+
+    def decode(self, data, start):
+        """ Декодирует base64 блоками во временный файл. Пробелы
+        и переносы строк отбрасываются, а неполная четверка символов
+        переносится в следующий блок, чтобы не сбить выравнивание.
+        """
+        file = None
+        rest = ''
+        try:
+            for position in range(start, len(data), IMAGE_DECODE_CHUNK_SIZE):
+                piece = rest + WHITESPACE_RE.sub(
+                    '', data[position:position + IMAGE_DECODE_CHUNK_SIZE])
+                if not BASE64_RE.fullmatch(piece):
+                    raise binascii.Error
+                usable = len(piece) // 4 * 4
+                rest = piece[usable:]
+                if not usable:
+                    continue
+                chunk = binascii.a2b_base64(piece[:usable])
+                if file is None:
+                    extension = guess_extension(chunk)
+                    if extension is None:
+                        raise serializers.ValidationError(
+                            MESSAGE_IMAGE_TYPE.format(
+                                formats=', '.join(IMAGE_SIGNATURES)))
+                    file = TemporaryUploadedFile(
+                        f'{uuid.uuid4()}.{extension}',
+                        IMAGE_CONTENT_TYPES[extension], 0, None)
+                file.write(chunk)
+            if rest:
+                raise binascii.Error
+        except binascii.Error:
+            if file is not None:
+                file.close()
+            raise serializers.ValidationError(MESSAGE_IMAGE_INVALID)
+        if file is None:
+            raise serializers.ValidationError(MESSAGE_IMAGE_INVALID)
+        file.size = file.tell()
+        file.seek(0)
+        return file
+
+    def check_dimensions(self, file):
+        """ Image.open читает только заголовок, пиксели не декодируются. """
+        try:
+            width, height = Image.open(file).size
+        except Exception:
+            raise serializers.ValidationError(MESSAGE_IMAGE_INVALID)
+        finally:
+            file.seek(0)
+        if width > self.max_width or height > self.max_height:
+            raise serializers.ValidationError(
+                MESSAGE_IMAGE_DIMENSIONS.format(
+                    width=self.max_width, height=self.max_height))
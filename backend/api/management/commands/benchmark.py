@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.benchmark import BenchmarkRunner, Dataset, compare
+from foodgram.constants import (
+    BENCHMARK_CONCURRENCY,
+    BENCHMARK_REQUESTS,
+    BENCHMARK_SEED,
+    BENCHMARK_TOLERANCE,
+)
+
+BASELINE_PATH = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест API на синтетических данных '
+            '(см. seed_benchmark) со сравнением с базовым прогоном.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=BENCHMARK_REQUESTS)
+        parser.add_argument(
+            '--concurrency', type=int, default=BENCHMARK_CONCURRENCY,
+            help='Количество потоков с собственным клиентом.')
+        parser.add_argument('--seed', type=int, default=BENCHMARK_SEED)
+        parser.add_argument(
+            '--warmup', type=int, default=200,
+            help='Запросов для прогрева кэшей, в отчет не попадают.')
+        parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Сохранить результат как базовый прогон.')
+        parser.add_argument(
+            '--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+            help='Допустимое ухудшение времени и пропускной способности.')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            dataset = Dataset()
+        except ValueError as e:
+            raise CommandError(e)
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            if options['warmup']:
+                BenchmarkRunner(
+                    dataset, options['warmup'], 1, options['seed']).run()
+            report = BenchmarkRunner(
+                dataset, options['requests'], options['concurrency'],
+                options['seed']
+            ).run()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_report(report)
+
+        path = options['baseline']
+        if options['save_baseline']:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовый прогон сохранен в {path}'))
+            return
+        if not path.exists():
+            return
+        regressions = compare(
+            report, json.loads(path.read_text()), options['tolerance'])
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базового прогона:\n'
+                + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS(
+            'Регрессий относительно базового прогона нет.'))
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"маршрут":<32}{"запросов":>9}{"p50":>9}{"p95":>9}'
+            f'{"p99":>9}{"SQL":>7}{"5xx":>5}')
+        for name, route in report['routes'].items():
+            self.stdout.write(
+                f'{name:<32}{route["count"]:>9}{route["p50"]:>9}'
+                f'{route["p95"]:>9}{route["p99"]:>9}{route["queries"]:>7}'
+                f'{route["errors"]:>5}')
+        self.stdout.write(
+            f'Всего {report["requests"]} запросов, '
+            f'{report["throughput"]} запросов/с, p50 {report["p50"]} мс, '
+            f'p95 {report["p95"]} мс, p99 {report["p99"]} мс')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.benchmark import PATH_BENCHMARKS, measure
+
+
+class Command(BaseCommand):
+    help = ('Сравнение реализаций отдельных путей (сериализаторы, поиск, '
+            'пагинация) на данных из базы, см. seed_benchmark.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help=f'Сравнения: {", ".join(PATH_BENCHMARKS)}. '
+                 'По умолчанию - все.')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Размер страницы или выборки.')
+        parser.add_argument(
+            '--page', type=int, default=10000,
+            help='Номер глубокой страницы для сравнения пагинаций.')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(PATH_BENCHMARKS)
+        unknown = set(names) - set(PATH_BENCHMARKS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные сравнения: {", ".join(sorted(unknown))}')
+        self.stdout.write(f'{"путь":<48}{"p50, мс":>10}{"SQL":>6}')
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name in names:
+                for label, func in PATH_BENCHMARKS[name](options):
+                    median, queries = measure(func, options['repeat'])
+                    self.stdout.write(
+                        f'{f"{name}: {label}":<48}{median:>10}'
+                        f'{queries:>6}')
@@ -0,0 +1,64 @@
+import json
+import random
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import Dataset, HttpLoad, read_paths
+from foodgram.constants import (
+    BENCHMARK_SEED,
+    LOAD_TEST_CONCURRENCY,
+    LOAD_TEST_DURATION,
+    LOAD_TEST_PATHS,
+)
+
+
+class Command(BaseCommand):
+    help = ('Нагрузка на запущенный сервер по HTTP со смесью запросов '
+            'на чтение (см. seed_benchmark): сравнение WSGI и ASGI.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'url', help='Адрес сервера, например http://127.0.0.1:8000')
+        parser.add_argument(
+            '--concurrency', type=int, default=LOAD_TEST_CONCURRENCY,
+            help='Количество одновременных клиентов с keep-alive.')
+        parser.add_argument(
+            '--duration', type=float, default=LOAD_TEST_DURATION,
+            help='Длительность прогона в секундах.')
+        parser.add_argument('--seed', type=int, default=BENCHMARK_SEED)
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Запросы без токена.')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Нужен адрес вида http://host:port.')
+        try:
+            dataset = Dataset()
+        except ValueError as e:
+            raise CommandError(e)
+        paths = [
+            quote(path, safe='/?=&')
+            for path in read_paths(
+                dataset, random.Random(options['seed']), LOAD_TEST_PATHS)
+        ]
+        token = None
+        if not options['anonymous']:
+            token = next(iter(dataset.tokens.values()))
+        try:
+            report = HttpLoad(
+                url.hostname, url.port or 80, paths,
+                options['concurrency'], options['duration'], token
+            ).run()
+        except ValueError as e:
+            raise CommandError(e)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f'{report["requests"]} запросов, {report["throughput"]} '
+            f'запросов/с, p50 {report["p50"]} мс, p95 {report["p95"]} мс, '
+            f'p99 {report["p99"]} мс, ошибок {report["errors"]}')
@@ -1,16 +1,133 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
 from rest_framework import status
 from rest_framework.response import Response
 
-from .serializers import ShortRecipeSerializer, SubscriptionReadSerializer
-from recipes.models import Recipe, Subscription, User
+from .serializers import (
+    RecipeIdsSerializer,
+    ShortRecipeSerializer,
+    SubscriptionReadSerializer,
+    get_recipes_limit,
+)
+from foodgram.cache import get_generation
+from foodgram.constants import (
+    BULK_ABSENT,
+    BULK_ADDED,
+    BULK_EXISTS,
+    BULK_NOT_FOUND,
+    BULK_REMOVED,
+    MESSAGE_RECIPE_NOT_ADDED,
+    RESPONSE_CACHE_TTL,
+)
+from recipes.models import (
+    RECIPE_COUNTERS,
+    Recipe,
+    Subscription,
+    User,
+)
+
+
+class CachedResponseMixin:
+    """ Кэширует ответы list и retrieve.
+    Ключ строится из схемы и хоста (в ответах абсолютные ссылки),
+    пути, упорядоченных параметров запроса и поколения данных,
+    которое сдвигается сигналами при записи.
+    Условные заголовки проверяются только для ответа 200 - из кэша
+    или только что собранного, то есть после проверки прав и 404.
+    """
+
+    cache_generation = None
+    cache_authenticated = False
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_request_digest(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        url = f'{request.scheme}://{request.get_host()}{request.path}'
+        return hashlib.md5(f'{url}?{params}'.encode()).hexdigest()
+
+    def is_not_modified(self, request, etag, modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or any(
+                tag.removeprefix('W/') == etag.removeprefix('W/')
+                for tag in etags
+            )
+        if_modified_since = parse_http_date_safe(
+            request.headers.get('If-Modified-Since', ''))
+        return bool(if_modified_since) and int(modified) <= if_modified_since
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated and not self.cache_authenticated:
+            return handler(request, *args, **kwargs)
+
+        generation, modified = get_generation(self.cache_generation)
+        digest = self.get_request_digest(request)
+        key = f'response:{self.cache_generation}:{generation}:{digest}'
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, RESPONSE_CACHE_TTL)
+
+        headers = {
+            'ETag': f'W/"{self.cache_generation}-{generation}-{digest}"',
+            'Last-Modified': http_date(modified),
+        }
+        if self.is_not_modified(request, headers['ETag'], modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+        return Response(data, headers=headers)
 
 
 class RecipeFavoriteMixin:
+    def lock_recipes(self, pks):
+        """ Рецепты с блокировкой строк в порядке pk. Добавление
+        и удаление связей сначала блокируют рецепты, затем меняют
+        строки связей и счетчики: параллельные запросы к одним
+        рецептам идут по очереди и видят строки друг друга, а рецепт
+        не удаляется до конца транзакции.
+        """
+        return Recipe.objects.filter(pk__in=pks).order_by(
+            'pk').select_for_update(no_key=True)
+
+    def increment_counters(self, model, pks):
+        """ Счетчики после bulk_create, который не отправляет
+        сигналов; остальные изменения учитывают сигналы.
+        """
+        if not pks:
+            return
+        field = RECIPE_COUNTERS[model]
+        Recipe.objects.filter(pk__in=pks).update(**{field: F(field) + 1})
+
+    def get_recipe_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    @transaction.atomic
     def add_recipe(self, request, pk, serializer_class):
         """ Добавление рецепта в избранное или корзину. """
 
-        recipe = get_object_or_404(Recipe, id=pk)
+        recipe = get_object_or_404(self.lock_recipes([pk]))
         data = {
             'user': request.user.id,
             'recipe': recipe.id
@@ -19,22 +136,83 @@ class RecipeFavoriteMixin:
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(
-            ShortRecipeSerializer(recipe).data,
+            ShortRecipeSerializer(recipe, context={'request': request}).data,
             status=status.HTTP_201_CREATED
         )
 
+    @transaction.atomic
     def remove_recipe(self, request, pk, model):
         """ Удаление рецепта из избранного или корзины. """
 
-        obj = get_object_or_404(model, user=request.user, recipe=pk)
-        obj.delete()
+        get_object_or_404(self.lock_recipes([pk]).only('pk'))
+        deleted, _ = model.objects.filter(
+            user=request.user, recipe=pk).delete()
+        if not deleted:
+            return Response(
+                {'errors': MESSAGE_RECIPE_NOT_ADDED},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @transaction.atomic
+    def add_recipes(self, request, model):
+        """ Добавление нескольких рецептов в избранное или корзину:
+        одна выборка рецептов с блокировкой, одна вставка и одно
+        обновление счетчиков. Результат - по каждому id. Пока рецепты
+        заблокированы, никто не добавит ту же пару и не удалит рецепт,
+        поэтому счетчики растут ровно на число вставленных строк.
+        """
+        ids = self.get_recipe_ids(request)
+        recipes = self.lock_recipes(ids).only(
+            *ShortRecipeSerializer.Meta.fields, 'image_variants'
+        ).in_bulk()
+        existing = set(model.objects.filter(
+            user=request.user, recipe__in=recipes
+        ).values_list('recipe_id', flat=True))
+        added = [pk for pk in recipes if pk not in existing]
+        model.objects.bulk_create(
+            [model(user=request.user, recipe_id=pk) for pk in added])
+        self.increment_counters(model, added)
+        results = []
+        for pk in ids:
+            if pk not in recipes:
+                results.append({'id': pk, 'status': BULK_NOT_FOUND})
+                continue
+            results.append({
+                'id': pk,
+                'status': BULK_EXISTS if pk in existing else BULK_ADDED,
+                'recipe': ShortRecipeSerializer(
+                    recipes[pk], context={'request': request}).data,
+            })
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @transaction.atomic
+    def remove_recipes(self, request, model):
+        """ Удаление нескольких рецептов из избранного или корзины
+        одним DELETE ... WHERE recipe_id IN (...). Рецепты блокируются
+        заранее, чтобы параллельное удаление не уменьшило
+        счетчики дважды.
+        """
+        ids = self.get_recipe_ids(request)
+        list(self.lock_recipes(ids).values_list('pk', flat=True))
+        removed = set(model.objects.filter(
+            user=request.user, recipe__in=ids
+        ).values_list('recipe_id', flat=True))
+        if removed:
+            model.objects.filter(
+                user=request.user, recipe__in=removed).delete()
+        return Response({'results': [
+            {'id': pk, 'status': BULK_REMOVED if pk in removed
+             else BULK_ABSENT}
+            for pk in ids
+        ]}, status=status.HTTP_200_OK)
+
 
 class SubscribeMixin:
     def add_subscription(self, request, pk, serializer_class):
         """ Подписаться на автора рецептов. """
 
+        get_recipes_limit(request)
         author = get_object_or_404(User, id=pk)
         data = {
             'user': request.user.id,
@@ -44,7 +222,8 @@ class SubscribeMixin:
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(
-            SubscriptionReadSerializer(author).data,
+            SubscriptionReadSerializer(
+                author, context={'request': request}).data,
             status=status.HTTP_201_CREATED
         )
 
@@ -1,8 +1,49 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 from foodgram.constants import PAGE_SIZE
 
 
+class KeysetPagination(CursorPagination):
+    """ Пагинация по курсору: без COUNT(*) и OFFSET,
+    порядок берется из Meta.ordering модели.
+    """
+
+    page_size_query_param = 'limit'
+    page_size = PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(queryset.model._meta.ordering)
+
+    @classmethod
+    def supports(cls, queryset):
+        """ Курсор возможен, если выборка не упорядочена иначе, чем
+        Meta.ordering: CursorPagination заменяет порядок своим, а,
+        например, ранжирование поиска по курсору не пролистать.
+        """
+        order_by = tuple(queryset.query.order_by)
+        return not order_by or order_by == tuple(
+            queryset.model._meta.ordering)
+
+
 class LimitPagination(PageNumberPagination):
+    """ Постраничная пагинация. При наличии параметра cursor
+    (в том числе пустого) переключается на KeysetPagination,
+    если выборка упорядочена по Meta.ordering модели.
+    """
+
     page_size_query_param = 'limit'
     page_size = PAGE_SIZE
+    cursor_query_param = KeysetPagination.cursor_query_param
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.cursor_query_param in request.query_params
+                and KeysetPagination.supports(queryset)):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,19 @@
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """ JSONRenderer, который учитывает время сериализации ответа
+    в замерах запроса RequestMetricsMiddleware.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            request = (renderer_context or {}).get('request')
+            metrics = getattr(request, 'metrics', None)
+            if metrics is not None:
+                metrics.render_time += time.perf_counter() - started
@@ -1,20 +1,33 @@
-from django.core.exceptions import ObjectDoesNotExist
+from collections import Counter
+
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 from rest_framework.validators import UniqueTogetherValidator
-from drf_extra_fields.fields import Base64ImageField
 from djoser.serializers import UserSerializer
 
+from api.fields import CloseUploadsMixin, StreamingBase64ImageField
 from foodgram.constants import (
+    BULK_RECIPES_LIMIT,
     PAGE_SIZE,
     COOKING_TIME_MIN,
     INGREDIENT_AMOUNT_MIN,
     MESSAGE_COOKING_TIME,
     MESSAGE_AMOUNT,
+    MESSAGE_INGREDIENTS_UNIQUE,
     MESSAGE_NOT_TAGS,
     MESSAGE_TAGS_UNIQUE,
-    INGREDIENT_NOT_FOUND
+    INGREDIENT_NOT_FOUND,
+    TAGS_NOT_FOUND,
+)
+from foodgram.images import (
+    build_image_url,
+    build_variant_url,
+    build_variant_urls,
+    get_variant_url,
+    get_variant_urls,
 )
+from recipes.cards import INGREDIENT_FIELDS, TAG_FIELDS, get_card
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -28,11 +41,46 @@ from users.models import User
 from shortener.models import LinkMapped
 
 
-class UserSerializer(UserSerializer):
+def validate_ids(ids, model, message_unique, message_not_found):
+    """ Проверяет список id одним запросом in_bulk.
+    Сообщает сразу о повторах и об отсутствующих объектах.
+    """
+    counts = Counter(ids)
+    found = model.objects.in_bulk(counts)
+    duplicates = [pk for pk, count in counts.items() if count > 1]
+    missing = [pk for pk in counts if pk not in found]
+    errors = []
+    if duplicates:
+        errors.append(message_unique.format(
+            ids=', '.join(map(str, duplicates))))
+    if missing:
+        errors.append(message_not_found.format(
+            ids=', '.join(map(str, missing))))
+    if errors:
+        raise serializers.ValidationError(errors)
+    return found
+
+
+def get_recipes_limit(request):
+    """ Лимит рецептов автора из параметра recipes_limit:
+    неотрицательное целое, не больше PAGE_SIZE.
+    """
+    limit = request.query_params.get('recipes_limit')
+    if limit is None:
+        return PAGE_SIZE
+    try:
+        limit = serializers.IntegerField(min_value=0).run_validation(limit)
+    except serializers.ValidationError as e:
+        raise serializers.ValidationError({'recipes_limit': e.detail})
+    return min(limit, PAGE_SIZE)
+
+
+class UserSerializer(CloseUploadsMixin, UserSerializer):
     """ Сериализатор для модели User. """
 
     is_subscribed = serializers.SerializerMethodField()
-    avatar = Base64ImageField(required=False)
+    avatar = StreamingBase64ImageField(required=False)
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -44,24 +92,36 @@ class UserSerializer(UserSerializer):
             'last_name',
             'is_subscribed',
             'avatar',
+            'avatar_variants',
         )
 
+    def get_avatar_variants(self, obj):
+        return get_variant_urls(
+            obj.avatar, obj.avatar_variants, self.context['request'])
+
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request_user = self.context['request'].user
-        if not request_user.is_authenticated:
+        if not request_user.is_authenticated or request_user.pk == obj.pk:
             return False
         return request_user.subscriber.filter(author=obj).exists()
 
 
-class AvatarSerializer(serializers.ModelSerializer):
+class AvatarSerializer(CloseUploadsMixin, serializers.ModelSerializer):
     """ Сериализатор для аватара пользователя. """
 
-    avatar = Base64ImageField()
+    avatar = StreamingBase64ImageField()
 
     class Meta:
         model = User
         fields = ('avatar',)
 
+    def update(self, instance, validated_data):
+        instance.avatar = validated_data['avatar']
+        instance.save(update_fields=('avatar',))
+        return instance
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     """ Сериализатор для модели Ingredient. """
@@ -80,30 +140,12 @@ class IngredientSerializer(serializers.ModelSerializer):
         )
 
 
-class IngredientRecipeGetSerializer(serializers.ModelSerializer):
-    """ Сериализатор для модели IngredientRecipe при GET запросах. """
-
-    id = serializers.ReadOnlyField(source='ingredient.id')
-    name = serializers.ReadOnlyField(source='ingredient.name')
-    measurement_unit = serializers.ReadOnlyField(
-        source='ingredient.measurement_unit')
-
-    class Meta:
-        model = IngredientRecipe
-        fields = (
-            'id',
-            'name',
-            'measurement_unit',
-            'amount'
-        )
-
-
 class IngredientRecipeSerializer(serializers.ModelSerializer):
     """ Сериализатор для модели IngredientRecipe
     при небезопасных запросах.
     """
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=INGREDIENT_AMOUNT_MIN)
 
     class Meta:
@@ -113,17 +155,6 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
             'amount'
         )
 
-    def to_internal_value(self, data):
-        validated_data = super().to_internal_value(data)
-        try:
-            ingredient = Ingredient.objects.get(id=data['id'])
-        except ObjectDoesNotExist:
-            raise serializers.ValidationError({
-                'id': INGREDIENT_NOT_FOUND.format(id=data['id'])
-            })
-        validated_data['ingredient'] = ingredient
-        return validated_data
-
 
 class TagSerializer(serializers.ModelSerializer):
     """ Сериализатор для модели Tag. """
@@ -138,16 +169,10 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class RecipeGetSerializer(serializers.ModelSerializer):
-    """ Сериализатор для модели Recipe при GET запросах. """
-
-    tags = TagSerializer(many=True, read_only=True)
-    author = UserSerializer(read_only=True)
-    image = Base64ImageField(required=False, allow_null=True)
-    ingredients = IngredientRecipeGetSerializer(
-        many=True, source='amount_ingredients'
-    )
-    is_favorited = serializers.SerializerMethodField(read_only=True)
-    is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
+    """ Сериализатор для модели Recipe при GET запросах.
+    Ответ целиком собирается из карточки в to_representation,
+    поля Meta описывают рецепт для браузерного API.
+    """
 
     class Meta:
         model = Recipe
@@ -156,37 +181,87 @@ class RecipeGetSerializer(serializers.ModelSerializer):
             'tags',
             'author',
             'ingredients',
-            'is_favorited',
-            'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         )
 
+    def get_image_variant(self):
+        """ В списке рецептов отдается карточка, а не оригинал. """
+        view = self.context.get('view')
+        return 'card' if getattr(view, 'action', None) == 'list' else 'full'
+
     def get_is_favorited(self, obj):
         """ Метод для is_favorited. """
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         return (user.is_authenticated
                 and user.favorites.filter(recipe=obj).exists())
 
     def get_is_in_shopping_cart(self, obj):
         """ Метод для is_in_shopping_cart. """
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         return (user.is_authenticated
                 and user.cart.filter(recipe=obj).exists())
 
+    def get_is_subscribed(self, obj, author_id):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        user = self.context['request'].user
+        return (user.is_authenticated
+                and user.subscriber.filter(author=author_id).exists())
 
-class RecipeSerializer(serializers.ModelSerializer):
+    def to_representation(self, obj):
+        """ Рецепт собирается из готовой карточки (recipes.cards):
+        к ней добавляются флаги пользователя, аннотированные
+        with_cards, и ссылки на изображения для текущего запроса.
+        """
+        card = get_card(obj)
+        request = self.context['request']
+        author = card['author']
+        return {
+            'id': card['id'],
+            'tags': [dict(zip(TAG_FIELDS, tag)) for tag in card['tags']],
+            'author': {
+                'id': author['id'],
+                'email': author['email'],
+                'username': author['username'],
+                'first_name': author['first_name'],
+                'last_name': author['last_name'],
+                'is_subscribed': self.get_is_subscribed(obj, author['id']),
+                'avatar': build_image_url(author['avatar'], request),
+                'avatar_variants': build_variant_urls(
+                    author['avatar'], author['avatar_variants'], request),
+            },
+            'ingredients': [
+                dict(zip(INGREDIENT_FIELDS, ingredient))
+                for ingredient in card['ingredients']
+            ],
+            'is_favorited': self.get_is_favorited(obj),
+            'is_in_shopping_cart': self.get_is_in_shopping_cart(obj),
+            'name': card['name'],
+            'image': build_variant_url(
+                card['image'], card['image_variants'],
+                self.get_image_variant(), request),
+            'image_variants': build_variant_urls(
+                card['image'], card['image_variants'], request),
+            'text': card['text'],
+            'cooking_time': card['cooking_time'],
+        }
+
+
+class RecipeSerializer(CloseUploadsMixin, serializers.ModelSerializer):
     """ Сериализатор для модели Recipe при небезопасных запросах. """
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     author = UserSerializer(read_only=True)
     ingredients = IngredientRecipeSerializer(many=True)
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
 
     class Meta:
         model = Recipe
@@ -208,19 +283,25 @@ class RecipeSerializer(serializers.ModelSerializer):
                     'value': COOKING_TIME_MIN})
         return cooking_time
 
+    def validate_tags(self, tags):
+        found = validate_ids(tags, Tag, MESSAGE_TAGS_UNIQUE, TAGS_NOT_FOUND)
+        return [found[pk] for pk in tags]
+
+    def validate_ingredients(self, ingredients):
+        validate_ids(
+            [item['id'] for item in ingredients],
+            Ingredient,
+            MESSAGE_INGREDIENTS_UNIQUE,
+            INGREDIENT_NOT_FOUND
+        )
+        return ingredients
+
     def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        if not ingredients:
+        if not data.get('ingredients'):
             raise serializers.ValidationError(
                 {'ingredients': MESSAGE_AMOUNT})
-
-        tags = self.initial_data.get('tags')
-        if not tags:
+        if not data.get('tags'):
             raise serializers.ValidationError(MESSAGE_NOT_TAGS)
-
-        if len(data['tags']) != len(set(data['tags'])):
-            raise serializers.ValidationError(MESSAGE_TAGS_UNIQUE)
-        data['ingredients'] = ingredients
         return data
 
     def create_ingredients(self, ingredients, recipe):
@@ -233,6 +314,36 @@ class RecipeSerializer(serializers.ModelSerializer):
             for ingredient in ingredients
         ])
 
+    def update_ingredients(self, ingredients, recipe):
+        """ Приводит ингредиенты рецепта к переданному списку:
+        удаляет лишние, обновляет изменившиеся и добавляет новые строки.
+        """
+        existing = {
+            item.ingredient_id: item
+            for item in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        to_create = []
+        to_update = []
+        for ingredient in ingredients:
+            amount = int(ingredient['amount'])
+            item = existing.pop(int(ingredient['id']), None)
+            if item is None:
+                to_create.append(IngredientRecipe(
+                    recipe=recipe,
+                    ingredient_id=ingredient['id'],
+                    amount=amount,
+                ))
+            elif item.amount != amount:
+                item.amount = amount
+                to_update.append(item)
+        if existing:
+            IngredientRecipe.objects.filter(
+                pk__in=[item.pk for item in existing.values()]
+            ).delete()
+        IngredientRecipe.objects.bulk_update(to_update, ('amount',))
+        IngredientRecipe.objects.bulk_create(to_create)
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
@@ -241,34 +352,60 @@ class RecipeSerializer(serializers.ModelSerializer):
         self.create_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         instance.tags.set(tags)
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        super().update(instance, validated_data)
-        self.create_ingredients(ingredients, instance)
-        instance.save()
-        return instance
+        self.update_ingredients(ingredients, instance)
+        return super().update(instance, validated_data)
 
     def to_representation(self, instance):
-        request = self.context.get('request')
-        context = {'request': request}
-        return RecipeGetSerializer(instance, context=context).data
+        instance = Recipe.objects.with_cards(
+            self.context['request'].user
+        ).get(pk=instance.pk)
+        return RecipeGetSerializer(instance, context=self.context).data
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """ Сериализатор для Favorite и ShoppingCart. """
 
+    image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
 
+    def get_image(self, obj):
+        return get_variant_url(
+            obj.image, obj.image_variants, 'card', self.context['request'])
+
+    def get_image_variants(self, obj):
+        return get_variant_urls(
+            obj.image, obj.image_variants, self.context['request'])
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """ Список id рецептов для массового добавления и удаления
+    в избранном и корзине. Повторы отбрасываются.
+    """
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT,
+    )
+
+    def validate_recipes(self, recipes):
+        return list(dict.fromkeys(recipes))
+
 
 class FavoriteAndShoppingCartSerializerBase(serializers.ModelSerializer):
     """ Сериализатор для модели Favorite. """
@@ -341,16 +478,15 @@ class SubscriptionReadSerializer(UserSerializer):
 
     def get_recipes(self, obj):
         """ Возвращает список рецептов пользователя,
-        учитывая заданный лимит.
+        учитывая заданный лимит. Вьюсет может заранее загрузить
+        рецепты всех авторов страницы и передать их в контексте.
         """
-        request = self.context.get('request')
-        limit = request.query_params.get('recipes_limit', PAGE_SIZE)
-        try:
-            limit = min(int(limit), PAGE_SIZE)
-        except ValueError:
-            limit = PAGE_SIZE
-
-        recipes = Recipe.objects.filter(author=obj)[:limit]
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is not None:
+            recipes = recipes_by_author.get(obj.id, [])
+        else:
+            limit = get_recipes_limit(self.context['request'])
+            recipes = Recipe.objects.filter(author=obj)[:limit]
         serializer = ShortRecipeSerializer(recipes, many=True,
                                            context=self.context)
         return serializer.data
@@ -363,6 +499,8 @@ class ShortenerSerializer(serializers.ModelSerializer):
         model = LinkMapped
         fields = ('original_url',)
         write_only_fields = ('original_url',)
+        # Существующая ссылка возвращается create_link, а не ошибкой.
+        extra_kwargs = {'original_url': {'validators': []}}
 
     def get_short_link(self, obj):
         request = self.context.get('request')
@@ -371,8 +509,7 @@ class ShortenerSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        instance, _ = LinkMapped.objects.get_or_create(**validated_data)
-        return instance
+        return LinkMapped.objects.create_link(validated_data['original_url'])
 
     def to_representation(self, instance):
         return {'short-link': self.get_short_link(instance)}
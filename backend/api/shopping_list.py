@@ -0,0 +1,104 @@
+import csv
+import io
+from pathlib import Path
+
+from django.db.models import Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from foodgram.constants import (
+    SHOPPING_LIST_CHUNK_SIZE,
+    SHOPPING_LIST_PDF_FONT,
+    SHOPPING_LIST_PDF_FONT_SIZE,
+    SHOPPING_LIST_PDF_LEADING,
+    SHOPPING_LIST_PDF_MARGIN,
+    SHOPPING_LIST_PDF_TITLE_SIZE,
+)
+from recipes.models import IngredientRecipe
+
+FONT_PATH = Path(__file__).resolve().parent / 'fonts' / 'DejaVuSans.ttf'
+
+
+class Echo:
+    """ Псевдобуфер для csv.writer: возвращает строку вместо записи. """
+
+    def write(self, value):
+        return value
+
+
+def get_shopping_list(user):
+    """ Суммирует ингредиенты всех рецептов из корзины пользователя
+    одним запросом с группировкой по ингредиенту.
+    """
+    return IngredientRecipe.objects.filter(
+        recipe__cart__user=user
+    ).values(
+        'ingredient_id',
+    ).annotate(
+        total=Sum('amount')
+    ).values_list(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'total',
+    ).order_by('ingredient__name')
+
+
+def iter_rows(user):
+    return get_shopping_list(user).iterator(
+        chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+
+
+def render_txt(user):
+    yield 'Список покупок:\n'
+    for name, unit, total in iter_rows(user):
+        yield f'{name} ({unit}) - {total}\n'
+
+
+def render_csv(user):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Единица измерения', 'Количество'))
+    for row in iter_rows(user):
+        yield writer.writerow(row)
+
+
+def register_font():
+    """ Встроенные шрифты PDF не содержат кириллицы, поэтому
+    список набирается DejaVuSans из api/fonts.
+    """
+    if SHOPPING_LIST_PDF_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(SHOPPING_LIST_PDF_FONT, FONT_PATH))
+
+
+def render_pdf(user):
+    """ PDF собирается в памяти целиком и отдается одним куском:
+    ссылки на объекты и оглавление пишутся в конце файла.
+    """
+    register_font()
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setTitle('Список покупок')
+    _, height = A4
+    top = height - SHOPPING_LIST_PDF_MARGIN
+    pdf.setFont(SHOPPING_LIST_PDF_FONT, SHOPPING_LIST_PDF_TITLE_SIZE)
+    pdf.drawString(SHOPPING_LIST_PDF_MARGIN, top, 'Список покупок:')
+    pdf.setFont(SHOPPING_LIST_PDF_FONT, SHOPPING_LIST_PDF_FONT_SIZE)
+    y = top - SHOPPING_LIST_PDF_LEADING * 2
+    for name, unit, total in iter_rows(user):
+        if y < SHOPPING_LIST_PDF_MARGIN:
+            pdf.showPage()
+            pdf.setFont(SHOPPING_LIST_PDF_FONT, SHOPPING_LIST_PDF_FONT_SIZE)
+            y = top
+        pdf.drawString(
+            SHOPPING_LIST_PDF_MARGIN, y, f'{name} ({unit}) - {total}')
+        y -= SHOPPING_LIST_PDF_LEADING
+    pdf.save()
+    yield buffer.getvalue()
+
+
+RENDERERS = {
+    'txt': render_txt,
+    'csv': render_csv,
+    'pdf': render_pdf,
+}
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from recipes.search import ingredient_index
+from users.models import User
+
+
+class FoodgramTestCase(TestCase):
+    """ Общие данные тестов API: пользователи, теги, ингредиенты
+    и рецепты с построенными карточками.
+    """
+
+    @classmethod
+    def create_user(cls, username, **kwargs):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='Passw0rd!23',
+            first_name=username.title(),
+            last_name='Test',
+            **kwargs
+        )
+
+    @classmethod
+    def create_recipe(cls, author, name, tags=(), ingredients=(), **kwargs):
+        """ Рецепт со связями и счетчиком автора, как при создании
+        через API; карточки и поисковые векторы строятся колбэками
+        после коммита, которые здесь выполняются сразу.
+        """
+        with cls.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=name,
+                text=kwargs.pop('text', f'Описание: {name}'),
+                cooking_time=kwargs.pop('cooking_time', 10),
+                **kwargs
+            )
+            recipe.tags.set(tags)
+            IngredientRecipe.objects.bulk_create([
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=amount)
+                for ingredient, amount in ingredients
+            ])
+        recipe.refresh_from_db()
+        return recipe
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.user = cls.create_user('reader')
+        cls.breakfast = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.dinner = Tag.objects.create(name='Ужин', slug='dinner')
+        cls.milk = Ingredient.objects.create(
+            name='молоко', measurement_unit='мл')
+        cls.flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г')
+        cls.eggs = Ingredient.objects.create(
+            name='яйца', measurement_unit='шт')
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.invalidate()
+        self.anon = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
@@ -0,0 +1,32 @@
+import threading
+
+from asgiref.sync import async_to_sync
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from foodgram.async_views import async_view, close_connections
+
+
+class AsyncReadsTest(TestCase):
+
+    def setUp(self):
+        self.connections = []
+        self.addCleanup(close_connections)
+
+    def read(self, request):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.connections.append(
+            (threading.current_thread().name, connections['default']))
+        return HttpResponse('ok')
+
+    def test_pool_connections_are_closed(self):
+        view = async_to_sync(async_view(self.read))
+        response = view(RequestFactory().get('/api/tags/'))
+        self.assertEqual(response.content, b'ok')
+        [(thread, pool_connection)] = self.connections
+        self.assertTrue(thread.startswith('reads'))
+        self.assertIsNotNone(pool_connection.connection)
+        close_connections()
+        self.assertIsNone(pool_connection.connection)
@@ -0,0 +1,70 @@
+import base64
+import io
+
+from django.core.cache import cache
+from django.db.models import F
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.tests.base import FoodgramTestCase
+from users.authentication import get_cache_key
+from users.models import User
+
+PASSWORD = 'Passw0rd!23'
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+class CachedTokenAuthenticationTest(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.user)
+        self.token_client = APIClient()
+        self.token_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(
+            self.token_client.get('/api/users/me/').status_code, 200)
+
+    def bump_recipes_count(self):
+        """ Счетчик меняется в базе после того, как пользователь
+        попал в кэш токенов, как при создании рецепта.
+        """
+        User.objects.filter(pk=self.user.pk).update(
+            recipes_count=F('recipes_count') + 5)
+
+    def assertRecipesCount(self, count):
+        self.assertEqual(
+            User.objects.get(pk=self.user.pk).recipes_count, count)
+
+    def test_password_is_not_cached(self):
+        _, values = cache.get(get_cache_key(self.token.key))
+        self.assertNotIn(
+            User.objects.get(pk=self.user.pk).password, values)
+
+    def test_avatar_update_keeps_counter(self):
+        self.bump_recipes_count()
+        response = self.token_client.put(
+            '/api/users/me/avatar/', {'avatar': make_image()}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertRecipesCount(5)
+        response = self.token_client.delete('/api/users/me/avatar/')
+        self.assertEqual(response.status_code, 204)
+        self.assertRecipesCount(5)
+
+    def test_set_password_keeps_counter(self):
+        self.bump_recipes_count()
+        response = self.token_client.post(
+            '/api/users/set_password/',
+            {'current_password': PASSWORD, 'new_password': 'N3wPassw0rd!'},
+            format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertRecipesCount(5)
+        self.assertTrue(
+            User.objects.get(pk=self.user.pk).check_password('N3wPassw0rd!'))
@@ -0,0 +1,77 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Tag
+
+
+class CachedResponseTest(FoodgramTestCase):
+    """ Кэш ответов и условные запросы по ETag и Last-Modified. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe(
+            cls.author, 'Блины', tags=(cls.breakfast,),
+            ingredients=((cls.milk, 500),))
+
+    def test_not_modified(self):
+        url = reverse('api:recipe-list')
+        etag = self.anon.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.anon.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_path_and_query(self):
+        list_url = reverse('api:recipe-list')
+        etag = self.anon.get(list_url, {'limit': 2})['ETag']
+        self.assertNotEqual(
+            self.anon.get(list_url, {'limit': 3})['ETag'], etag)
+        detail_url = reverse('api:recipe-detail', args=[self.recipe.id])
+        response = self.anon.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Блины')
+
+    @override_settings(ALLOWED_HOSTS=['backend', 'foodgram.example'])
+    def test_links_follow_scheme_and_host(self):
+        self.create_recipe(self.author, 'Оладьи')
+        url = reverse('api:recipe-list')
+        internal = self.anon.get(url, {'limit': 1}, HTTP_HOST='backend')
+        public = self.anon.get(
+            url, {'limit': 1}, HTTP_HOST='foodgram.example', secure=True)
+        self.assertTrue(
+            internal.data['next'].startswith('http://backend/'))
+        self.assertTrue(
+            public.data['next'].startswith('https://foodgram.example/'))
+        self.assertNotEqual(internal['ETag'], public['ETag'])
+
+    def test_missing_object_is_404(self):
+        url = reverse('api:recipe-detail', args=[self.recipe.id + 1000])
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': '*'},
+            {'HTTP_IF_MODIFIED_SINCE': 'Fri, 01 Jan 2100 00:00:00 GMT'},
+        ):
+            with self.subTest(headers=headers):
+                response = self.anon.get(url, **headers)
+                self.assertEqual(response.status_code, 404)
+
+    def test_if_modified_since(self):
+        url = reverse('api:tag-list')
+        last_modified = self.anon.get(url)['Last-Modified']
+        response = self.anon.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag(self):
+        url = reverse('api:tag-list')
+        etag = self.anon.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Обед', slug='lunch')
+        response = self.anon.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_authenticated_recipes_are_not_cached(self):
+        response = self.client.get(reverse('api:recipe-list'))
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,43 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramTestCase
+from recipes.cards import rebuild_cards
+from recipes.models import Recipe
+
+card_migration = import_module('recipes.migrations.0009_recipe_card')
+
+
+class RecipeCardTest(FoodgramTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe(
+            cls.author, 'Блины', tags=(cls.dinner, cls.breakfast),
+            ingredients=((cls.milk, 300), (cls.eggs, 2)))
+
+    def get_card(self):
+        return Recipe.objects.get(pk=self.recipe.pk).card
+
+    def test_migration_fills_cards(self):
+        expected = self.get_card()
+        Recipe.objects.update(card={})
+        card_migration.fill_cards(apps, None)
+        self.assertEqual(self.get_card(), expected)
+
+    def test_rebuild_locks_rows_before_reading(self):
+        expected = self.get_card()
+        Recipe.objects.update(card={})
+        with CaptureQueriesContext(connection) as queries:
+            rebuild_cards(Recipe.objects.filter(pk=self.recipe.pk))
+        sql = [query['sql'] for query in queries]
+        locks = [index for index, query in enumerate(sql)
+                 if query.endswith('FOR UPDATE')]
+        reads = [index for index, query in enumerate(sql)
+                 if 'recipes_recipe_tags' in query]
+        self.assertTrue(locks and reads and locks[0] < reads[0])
+        self.assertEqual(self.get_card(), expected)
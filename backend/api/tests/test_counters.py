@@ -0,0 +1,45 @@
+from api.tests.base import FoodgramTestCase
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+
+class CountersTest(FoodgramTestCase):
+    """ Счетчики поддерживаются сигналами при записи в обход API:
+    из админки, shell и каскадным удалением.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe(cls.author, 'Блины')
+
+    def get_counters(self):
+        return Recipe.objects.values_list(
+            'favorites_count', 'cart_count').get(pk=self.recipe.pk)
+
+    def get_recipes_count(self, user):
+        return User.objects.get(pk=user.pk).recipes_count
+
+    def test_orm_writes(self):
+        favorite = Favorite.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        self.assertEqual(self.get_counters(), (1, 1))
+        favorite.save()
+        self.assertEqual(self.get_counters(), (1, 1))
+        Favorite.objects.filter(user=self.user).delete()
+        self.assertEqual(self.get_counters(), (0, 1))
+
+    def test_user_deletion_cascades(self):
+        other = self.create_user('other')
+        for user in (self.user, other):
+            Favorite.objects.create(user=user, recipe=self.recipe)
+            ShoppingCart.objects.create(user=user, recipe=self.recipe)
+        other.delete()
+        self.assertEqual(self.get_counters(), (1, 1))
+
+    def test_recipes_count(self):
+        self.assertEqual(self.get_recipes_count(self.author), 1)
+        recipe = self.create_recipe(self.author, 'Оладьи')
+        self.assertEqual(self.get_recipes_count(self.author), 2)
+        recipe.delete()
+        self.assertEqual(self.get_recipes_count(self.author), 1)
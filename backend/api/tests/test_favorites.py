@@ -0,0 +1,169 @@
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.tests.base import FoodgramTestCase
+from foodgram.constants import BULK_ADDED, BULK_EXISTS, BULK_NOT_FOUND
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+
+class FavoriteTest(FoodgramTestCase):
+    """ Добавление и удаление рецепта в избранном и корзине
+    вместе со счетчиками рецепта.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe(cls.author, 'Блины')
+
+    def get_counters(self):
+        return Recipe.objects.values_list(
+            'favorites_count', 'cart_count').get(pk=self.recipe.pk)
+
+    def test_add_and_remove(self):
+        for name, model, counters in (
+            ('favorite', Favorite, (1, 0)),
+            ('shopping-cart', ShoppingCart, (0, 1)),
+        ):
+            with self.subTest(name=name):
+                url = reverse(f'api:recipe-{name}', args=[self.recipe.id])
+                response = self.client.post(url)
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(response.data['id'], self.recipe.id)
+                self.assertEqual(self.get_counters(), counters)
+                self.assertEqual(self.client.post(url).status_code, 400)
+                self.assertEqual(self.get_counters(), counters)
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assertFalse(model.objects.exists())
+                self.assertEqual(self.get_counters(), (0, 0))
+
+    def test_remove_absent(self):
+        url = reverse('api:recipe-favorite', args=[self.recipe.id])
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_counters(), (0, 0))
+
+    def test_remove_missing_recipe(self):
+        url = reverse('api:recipe-favorite', args=[self.recipe.id + 1000])
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_remove_keeps_other_users(self):
+        Favorite.objects.create(user=self.author, recipe=self.recipe)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=1)
+        url = reverse('api:recipe-favorite', args=[self.recipe.id])
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertEqual(self.get_counters(), (1, 0))
+        self.assertTrue(Favorite.objects.filter(user=self.author).exists())
+
+    def test_anonymous(self):
+        url = reverse('api:recipe-favorite', args=[self.recipe.id])
+        self.assertEqual(self.anon.post(url).status_code, 401)
+        self.assertEqual(self.anon.delete(url).status_code, 401)
+
+
+class BulkFavoriteTest(FoodgramTestCase):
+    """ Массовое добавление: статусы по каждому id и счетчики. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [
+            cls.create_recipe(cls.author, f'Рецепт {index}')
+            for index in range(3)
+        ]
+
+    def test_add_counts_only_inserted_rows(self):
+        first, second, third = self.recipes
+        Favorite.objects.create(user=self.user, recipe=first)
+        Recipe.objects.filter(pk=first.pk).update(favorites_count=1)
+        missing = third.pk + 1000
+        response = self.client.post(
+            reverse('api:recipe-favorite-bulk'),
+            {'recipes': [first.pk, second.pk, missing]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item['id'], item['status'])
+             for item in response.data['results']],
+            [(first.pk, BULK_EXISTS), (second.pk, BULK_ADDED),
+             (missing, BULK_NOT_FOUND)])
+        self.assertEqual(
+            dict(Recipe.objects.values_list('pk', 'favorites_count')),
+            {first.pk: 1, second.pk: 1, third.pk: 0})
+
+
+class ConcurrentBulkFavoriteTest(TransactionTestCase):
+    """ Параллельные запросы к одним рецептам не сдвигают счетчики
+    и не падают на удаленном рецепте.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            password='Passw0rd!23')
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='Passw0rd!23')
+        self.recipes = [
+            Recipe.objects.create(
+                author=self.author, name=f'Рецепт {index}', text='Описание',
+                cooking_time=10)
+            for index in range(3)
+        ]
+        self.ids = [recipe.pk for recipe in self.recipes]
+
+    def run_concurrently(self, *calls):
+        barrier = threading.Barrier(len(calls))
+        results = [None] * len(calls)
+
+        def worker(index, call):
+            try:
+                barrier.wait()
+                results[index] = call()
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(index, call))
+            for index, call in enumerate(calls)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def add_all(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.post(
+            reverse('api:recipe-favorite-bulk'), {'recipes': self.ids},
+            format='json').status_code
+
+    def delete_recipe(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        return client.delete(
+            reverse('api:recipe-detail', args=[self.ids[0]])).status_code
+
+    def test_same_recipes_are_counted_once(self):
+        statuses = self.run_concurrently(*[self.add_all] * 4)
+        self.assertEqual(statuses, [200] * 4)
+        self.assertEqual(
+            list(Recipe.objects.order_by('pk').values_list(
+                'favorites_count', flat=True)),
+            [1, 1, 1])
+        self.assertEqual(Favorite.objects.count(), 3)
+
+    def test_recipe_deleted_concurrently(self):
+        statuses = self.run_concurrently(
+            self.add_all, self.add_all, self.delete_recipe)
+        self.assertEqual(statuses, [200, 200, 204])
+        self.assertEqual(
+            list(Recipe.objects.order_by('pk').values_list(
+                'favorites_count', flat=True)),
+            [1, 1])
@@ -0,0 +1,71 @@
+import base64
+import io
+import os
+import textwrap
+
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework import serializers
+
+from api import fields
+from api.fields import StreamingBase64ImageField
+
+
+def make_png(size):
+    """ PNG из шума: не сжимается, поэтому base64 больше блока. """
+    buffer = io.BytesIO()
+    Image.frombytes(
+        'RGB', (size, size), os.urandom(size * size * 3)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class StreamingBase64ImageFieldTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.png = make_png(200)
+        cls.encoded = base64.b64encode(cls.png).decode()
+
+    def decode(self, data):
+        file = StreamingBase64ImageField().to_internal_value(data)
+        self.addCleanup(file.close)
+        return file.read()
+
+    def test_larger_than_chunk(self):
+        self.assertGreater(len(self.encoded), fields.IMAGE_DECODE_CHUNK_SIZE)
+        self.assertEqual(
+            self.decode(f'data:image/png;base64,{self.encoded}'), self.png)
+
+    def test_line_wrapped(self):
+        for width, newline in ((76, '\n'), (64, '\r\n'), (77, '\n')):
+            with self.subTest(width=width, newline=newline):
+                wrapped = newline.join(textwrap.wrap(self.encoded, width))
+                self.assertEqual(
+                    self.decode(f'data:image/png;base64,{wrapped}'),
+                    self.png)
+
+    def test_small_chunks(self):
+        wrapped = '\n'.join(textwrap.wrap(self.encoded[:4000], 3))
+        for chunk_size in (17, 23, 64):
+            with self.subTest(chunk_size=chunk_size):
+                original = fields.IMAGE_DECODE_CHUNK_SIZE
+                fields.IMAGE_DECODE_CHUNK_SIZE = chunk_size
+                try:
+                    file = StreamingBase64ImageField().decode(wrapped, 0)
+                finally:
+                    fields.IMAGE_DECODE_CHUNK_SIZE = original
+                self.addCleanup(file.close)
+                self.assertEqual(
+                    file.read(), base64.b64decode(self.encoded[:4000]))
+
+    def test_invalid(self):
+        for data in (
+            self.encoded[:-1],
+            self.encoded[:100] + '!' + self.encoded[100:],
+            self.encoded[:100] + '=' + self.encoded[100:],
+            base64.b64encode(b'not an image at all').decode(),
+        ):
+            with self.subTest(data=data[-20:]):
+                with self.assertRaises(serializers.ValidationError):
+                    StreamingBase64ImageField().to_internal_value(data)
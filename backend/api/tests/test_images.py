@@ -0,0 +1,114 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+from api.tests.base import FoodgramTestCase
+from foodgram import images
+from foodgram.cache import bump_generation
+from foodgram.constants import GENERATION_RECIPES, IMAGE_VARIANTS
+from recipes.cards import rebuild_cards
+from recipes.models import Recipe
+
+
+def make_png(color, size=(1600, 1200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageVariantsTest(FoodgramTestCase):
+    """ Варианты изображений строятся в фоне; здесь задача
+    вызывается напрямую, без пула потоков и закрытия соединений.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        for name in ('executor', 'connections'):
+            patcher = mock.patch.object(images, name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.recipe = self.create_recipe(
+            self.author, 'Блины',
+            image=ContentFile(make_png('red'), name='pancakes.png'))
+
+    def on_done(self):
+        rebuild_cards(Recipe.objects.filter(pk=self.recipe.pk))
+        bump_generation(GENERATION_RECIPES)
+
+    def process(self):
+        images.process_image(
+            Recipe, self.recipe.pk, 'image', 'image_variants', self.on_done)
+        self.recipe.refresh_from_db()
+        return self.recipe.image_variants
+
+    def replace_image(self, color, name):
+        self.recipe.image.save(name, ContentFile(make_png(color)))
+
+    def test_variants_are_generated(self):
+        variants = self.process()
+        self.assertEqual(variants['source'], self.recipe.image.name)
+        for variant, size in IMAGE_VARIANTS.items():
+            with self.subTest(variant=variant):
+                with default_storage.open(variants[variant]) as file:
+                    image = Image.open(file)
+                    self.assertEqual(image.format, 'WEBP')
+                    self.assertEqual(max(image.size), size)
+
+    def test_replaced_image_deletes_old_variants(self):
+        previous = self.process()
+        self.replace_image('blue', 'waffles.png')
+        variants = self.process()
+        self.assertEqual(variants['source'], self.recipe.image.name)
+        for variant in IMAGE_VARIANTS:
+            with self.subTest(variant=variant):
+                self.assertFalse(default_storage.exists(previous[variant]))
+                self.assertTrue(default_storage.exists(variants[variant]))
+
+    def test_image_replaced_during_processing(self):
+        written = []
+
+        def make_variants(name):
+            variants = original(name)
+            written.extend(
+                path for variant, path in variants.items()
+                if variant != 'source')
+            Recipe.objects.filter(pk=self.recipe.pk).update(
+                image='media/recipes/other.png')
+            return variants
+
+        original = images.make_variants
+        with mock.patch.object(images, 'make_variants', make_variants):
+            variants = self.process()
+        self.assertEqual(variants, {})
+        self.assertTrue(written)
+        for path in written:
+            self.assertFalse(default_storage.exists(path))
+
+    def test_removed_image_clears_variants(self):
+        previous = self.process()
+        Recipe.objects.filter(pk=self.recipe.pk).update(image='')
+        self.assertEqual(self.process(), {})
+        for variant in IMAGE_VARIANTS:
+            self.assertFalse(default_storage.exists(previous[variant]))
+
+    def test_list_falls_back_to_source_image(self):
+        [recipe] = self.anon.get('/api/recipes/').data['results']
+        self.assertTrue(recipe['image'].endswith(self.recipe.image.name))
+        self.assertEqual(
+            set(recipe['image_variants'].values()), {recipe['image']})
+        variants = self.process()
+        [recipe] = self.anon.get('/api/recipes/').data['results']
+        self.assertTrue(recipe['image'].endswith(variants['card']))
+        self.assertTrue(
+            recipe['image_variants']['full'].endswith(variants['full']))
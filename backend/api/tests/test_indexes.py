@@ -0,0 +1,65 @@
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from api.filters import RecipeFilter
+from api.tests.base import FoodgramTestCase
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN для PostgreSQL')
+class FilterIndexTest(FoodgramTestCase):
+    """ Фильтры списка рецептов могут использовать свои индексы.
+    Таблицы в тестах маленькие, поэтому последовательное чтение
+    отключается: план без индекса тогда дороже любого индексного.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe(
+            cls.author, 'Блины', tags=(cls.breakfast,),
+            ingredients=((cls.milk, 500),))
+        Favorite.objects.create(user=cls.user, recipe=cls.recipe)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe)
+
+    def explain(self, params):
+        request = Request(RequestFactory().get('/api/recipes/', params))
+        request.user = self.user
+        queryset = RecipeFilter(
+            params, Recipe.objects.with_cards(self.user), request=request
+        ).qs[:6]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assertUsesIndex(self, params, *indexes):
+        """ План использует хотя бы один из индексов indexes
+        и не читает ни одну таблицу целиком.
+        """
+        plan = self.explain(params)
+        self.assertTrue(any(index in plan for index in indexes), plan)
+        self.assertNotIn('Seq Scan', plan, plan)
+
+    def test_author(self):
+        self.assertUsesIndex(
+            {'author': self.author.id}, 'recipe_author_id_idx')
+
+    def test_tags(self):
+        self.assertUsesIndex(
+            {'tags': ['breakfast', 'dinner']}, 'recipe_tags_tag_recipe_idx')
+
+    def test_favorites(self):
+        self.assertUsesIndex(
+            {'is_favorited': 1},
+            'recipes_favorite_unique', 'recipes_favorite_user_id_')
+
+    def test_shopping_cart(self):
+        self.assertUsesIndex(
+            {'is_in_shopping_cart': 1},
+            'unique_shopping_cart', 'recipes_shoppingcart_user_id_')
+
+    def test_search(self):
+        self.assertUsesIndex({'search': 'блины'}, 'recipe_search_vector_idx')
@@ -0,0 +1,72 @@
+from django.urls import reverse
+
+from api.serializers import IngredientSerializer
+from api.tests.base import FoodgramTestCase
+from recipes.models import Ingredient
+from recipes.search import normalize
+
+
+def sort_key(ingredient):
+    return normalize(ingredient.name), ingredient.measurement_unit
+
+
+class IngredientSearchTest(FoodgramTestCase):
+    """ Ответ из индекса в памяти совпадает с ответом сериализатора
+    по выборке ORM: сначала совпадения по префиксу, затем по подстроке.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Ingredient.objects.bulk_create([
+            Ingredient(name='сгущенное молоко', measurement_unit='г'),
+            Ingredient(name='молоко', measurement_unit='г'),
+            Ingredient(name='мёд', measurement_unit='г'),
+            Ingredient(name='кокосовое молоко', measurement_unit='мл'),
+        ])
+
+    def get_orm_payload(self, name):
+        """ Порядок задается в Python: сортировка в базе зависит
+        от правил сравнения (collation), в индексе - нет.
+        """
+        prefix = Ingredient.objects.filter(name__istartswith=name)
+        contains = Ingredient.objects.filter(
+            name__icontains=name).exclude(name__istartswith=name)
+        return IngredientSerializer(
+            sorted(prefix, key=sort_key) + sorted(contains, key=sort_key),
+            many=True).data
+
+    def test_index_matches_orm(self):
+        url = reverse('api:ingredient-list')
+        for name in ('мо', 'МОЛ', 'мука', 'ко', 'молоко'):
+            with self.subTest(name=name):
+                response = self.anon.get(url, {'name': name})
+                self.assertEqual(response.data, self.get_orm_payload(name))
+
+    def test_index_is_reused(self):
+        url = reverse('api:ingredient-list')
+        self.anon.get(url, {'name': 'мо'})
+        with self.assertNumQueries(0):
+            self.anon.get(url, {'name': 'мук'})
+
+    def test_yo_is_folded(self):
+        response = self.anon.get(
+            reverse('api:ingredient-list'), {'name': 'мед'})
+        self.assertEqual(
+            [item['name'] for item in response.data], ['мёд'])
+
+    def test_index_sees_new_ingredients(self):
+        url = reverse('api:ingredient-list')
+        self.anon.get(url, {'name': 'мо'})
+        Ingredient.objects.create(name='морковь', measurement_unit='шт')
+        response = self.anon.get(url, {'name': 'мор'})
+        self.assertEqual(
+            [item['name'] for item in response.data], ['морковь'])
+
+    def test_empty_name_returns_all(self):
+        response = self.anon.get(reverse('api:ingredient-list'))
+        self.assertEqual(
+            response.data,
+            IngredientSerializer(
+                sorted(Ingredient.objects.all(), key=sort_key),
+                many=True).data)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from foodgram.metrics import (
+    MetricsRegistry,
+    RequestMetrics,
+    alive_key,
+    collect_queries,
+    snapshot_key,
+)
+
+
+@override_settings(METRICS_TOKEN='secret', INTERNAL_IPS=['10.0.0.1'])
+class MetricsAccessTest(SimpleTestCase):
+
+    def test_forbidden_without_token(self):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    self.client.get('/metrics', **headers).status_code, 403)
+
+    def test_token(self):
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b'# TYPE foodgram_request_duration_seconds histogram',
+            response.content)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_internal_ips(self):
+        self.assertEqual(
+            self.client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code,
+            200)
+        self.assertEqual(
+            self.client.get(
+                '/metrics', HTTP_AUTHORIZATION='Bearer ').status_code,
+            403)
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    """ Сумма по процессам: простой и смерть процесса не уменьшают
+    счетчики.
+    """
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('foodgram.metrics.threading.Thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_worker(self, requests):
+        worker = MetricsRegistry()
+        worker.start()
+        for _ in range(requests):
+            worker.observe('recipe-list', 'GET', RequestMetrics(), 0.01)
+        worker.flush()
+        return worker
+
+    def count(self, registry):
+        return registry.collect()[('recipe-list', 'GET')][0]
+
+    def test_slots_are_unique(self):
+        slots = {self.make_worker(0).slot for _ in range(3)}
+        self.assertEqual(len(slots), 3)
+
+    def test_idle_worker_is_counted(self):
+        worker = self.make_worker(2)
+        reader = self.make_worker(1)
+        self.assertEqual(self.count(reader), 3)
+        # Снимок хранится без срока жизни, живость - отдельным ключом.
+        self.assertIsNone(
+            cache._expire_info[cache.make_key(snapshot_key(worker.slot))])
+
+    def test_dead_worker_is_folded_once(self):
+        worker = self.make_worker(2)
+        reader = self.make_worker(1)
+        cache.delete(alive_key(worker.slot))
+        self.assertEqual(self.count(reader), 3)
+        self.assertIsNone(cache.get(snapshot_key(worker.slot)))
+        self.assertEqual(self.count(reader), 3)
+        self.assertEqual(self.count(self.make_worker(0)), 3)
+
+    def test_folded_worker_starts_over(self):
+        worker = self.make_worker(2)
+        reader = self.make_worker(0)
+        cache.delete(alive_key(worker.slot))
+        self.assertEqual(self.count(reader), 2)
+        slot = worker.slot
+        worker.flush()
+        self.assertNotEqual(worker.slot, slot)
+        self.assertEqual(self.count(reader), 2)
+
+
+class CollectQueriesTest(TestCase):
+
+    def test_records_queries_and_restores_wrappers(self):
+        metrics = RequestMetrics()
+        before = list(connection.execute_wrappers)
+        with collect_queries(metrics):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        self.assertEqual(len(metrics.queries), 1)
+        self.assertEqual(connection.execute_wrappers, before)
@@ -0,0 +1,40 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from foodgram.middleware import (
+    ConnectionHealthCheckMiddleware,
+    RequestMetricsMiddleware,
+)
+
+
+async def async_response(request):
+    return HttpResponse('ok')
+
+
+def sync_response(request):
+    return HttpResponse('ok')
+
+
+class AsyncMiddlewareTest(SimpleTestCase):
+
+    def test_async_mode_follows_get_response(self):
+        for middleware in (
+            ConnectionHealthCheckMiddleware, RequestMetricsMiddleware
+        ):
+            with self.subTest(middleware=middleware.__name__):
+                self.assertTrue(asyncio.iscoroutinefunction(
+                    middleware(async_response)))
+                self.assertFalse(asyncio.iscoroutinefunction(
+                    middleware(sync_response)))
+
+    def test_async_call_records_metrics(self):
+        request = RequestFactory().get('/api/tags/')
+        request.resolver_match = None
+        middleware = RequestMetricsMiddleware(
+            ConnectionHealthCheckMiddleware(async_response))
+        response = async_to_sync(middleware)(request)
+        self.assertEqual(response.content, b'ok')
+        self.assertTrue(hasattr(request, 'metrics'))
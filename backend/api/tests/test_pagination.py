@@ -0,0 +1,76 @@
+from django.urls import reverse
+
+from api.tests.base import FoodgramTestCase
+
+
+class KeysetPaginationTest(FoodgramTestCase):
+    """ Постраничная выдача по курсору и откат к номерам страниц. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [
+            cls.create_recipe(
+                cls.author, f'Рецепт {index}',
+                text='Блины на молоке' if index % 2 else 'Каша')
+            for index in range(5)
+        ]
+        cls.ids = [recipe.id for recipe in reversed(cls.recipes)]
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_next_and_previous(self):
+        first = self.get(
+            reverse('api:recipe-list'), {'cursor': '', 'limit': 2})
+        self.assertNotIn('count', first)
+        self.assertIsNone(first['previous'])
+        pages = [first]
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+        self.assertEqual(
+            [[recipe['id'] for recipe in page['results']] for page in pages],
+            [self.ids[0:2], self.ids[2:4], self.ids[4:5]])
+
+        previous = self.get(pages[-1]['previous'])
+        self.assertEqual(
+            [recipe['id'] for recipe in previous['results']], self.ids[2:4])
+        previous = self.get(previous['previous'])
+        self.assertEqual(
+            [recipe['id'] for recipe in previous['results']], self.ids[0:2])
+        self.assertIsNone(previous['previous'])
+
+    def test_cursor_queries(self):
+        url = reverse('api:recipe-list')
+        with self.assertNumQueries(1):
+            page = self.get(url, {'cursor': '', 'limit': 2})
+        with self.assertNumQueries(1):
+            self.get(page['next'])
+
+    def test_page_numbers_without_cursor(self):
+        page = self.get(reverse('api:recipe-list'), {'limit': 2, 'page': 2})
+        self.assertEqual(page['count'], 5)
+        self.assertEqual(
+            [recipe['id'] for recipe in page['results']], self.ids[2:4])
+
+    def test_search_falls_back_to_page_numbers(self):
+        page = self.get(
+            reverse('api:recipe-list'),
+            {'search': 'блины', 'cursor': '', 'limit': 1})
+        self.assertEqual(page['count'], 2)
+        self.assertEqual(
+            [recipe['id'] for recipe in page['results']], [self.ids[1]])
+        page = self.get(page['next'])
+        self.assertEqual(
+            [recipe['id'] for recipe in page['results']], [self.ids[3]])
+        self.assertIsNone(page['next'])
+
+    def test_users(self):
+        first = self.get(reverse('api:users-list'), {'cursor': '', 'limit': 1})
+        second = self.get(first['next'])
+        self.assertEqual(
+            [first['results'][0]['username'],
+             second['results'][0]['username']],
+            ['author', 'reader'])
@@ -0,0 +1,160 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from api.serializers import validate_ids
+from api.tests.base import FoodgramTestCase
+from foodgram.constants import (
+    INGREDIENT_NOT_FOUND,
+    MESSAGE_INGREDIENTS_UNIQUE,
+)
+from recipes.models import Favorite, Ingredient, IngredientRecipe
+
+
+class RecipeListQueriesTest(FoodgramTestCase):
+    """ Число запросов списка и карточки рецепта не зависит
+    от размера страницы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [
+            cls.create_recipe(
+                cls.author, f'Рецепт {index}',
+                tags=(cls.breakfast, cls.dinner),
+                ingredients=((cls.milk, 200), (cls.flour, 100 + index)),
+            )
+            for index in range(12)
+        ]
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        url = reverse('api:recipe-list')
+        for client in (self.anon, self.client):
+            for limit in (2, 12):
+                with self.subTest(
+                    authenticated=client is self.client, limit=limit
+                ), self.assertNumQueries(2):
+                    response = client.get(url, {'limit': limit})
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_returns_cards(self):
+        response = self.client.get(
+            reverse('api:recipe-list'), {'limit': 12})
+        recipe = response.data['results'][-1]
+        self.assertEqual(recipe['id'], self.recipes[0].id)
+        self.assertTrue(recipe['is_favorited'])
+        self.assertFalse(recipe['is_in_shopping_cart'])
+        self.assertEqual(
+            [tag['slug'] for tag in recipe['tags']], ['breakfast', 'dinner'])
+        self.assertEqual(recipe['ingredients'], [
+            {'id': self.milk.id, 'name': 'молоко',
+             'measurement_unit': 'мл', 'amount': 200},
+            {'id': self.flour.id, 'name': 'мука',
+             'measurement_unit': 'г', 'amount': 100},
+        ])
+        self.assertEqual(recipe['author']['username'], 'author')
+
+    def test_detail_is_one_query(self):
+        url = reverse('api:recipe-detail', args=[self.recipes[0].id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data['name'], 'Рецепт 0')
+
+    def test_browsable_api_renders(self):
+        response = self.client.get(
+            reverse('api:recipe-list'), {'format': 'api'})
+        self.assertEqual(response.status_code, 200)
+
+
+class RecipeUpdateQueriesTest(FoodgramTestCase):
+    """ Обновление рецепта меняет только отличающиеся строки
+    ингредиентов и не трогает теги, если они не изменились.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г')
+        cls.recipe = cls.create_recipe(
+            cls.author, 'Блины', tags=(cls.breakfast,),
+            ingredients=((cls.milk, 500), (cls.flour, 200), (cls.eggs, 2)))
+
+    def setUp(self):
+        super().setUp()
+        self.author_client = APIClient()
+        self.author_client.force_authenticate(self.author)
+
+    def get_rows(self):
+        return {
+            item.ingredient_id: (item.pk, item.amount)
+            for item in IngredientRecipe.objects.filter(recipe=self.recipe)
+        }
+
+    def test_diff_update_queries(self):
+        before = self.get_rows()
+        with CaptureQueriesContext(connection) as context:
+            response = self.author_client.patch(
+                reverse('api:recipe-detail', args=[self.recipe.id]),
+                {
+                    'tags': [self.breakfast.id],
+                    'ingredients': [
+                        {'id': self.milk.id, 'amount': 400},
+                        {'id': self.eggs.id, 'amount': 2},
+                        {'id': self.salt.id, 'amount': 5},
+                    ],
+                },
+                format='json')
+        self.assertEqual(response.status_code, 200)
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        ingredient_writes = [
+            sql.split(' ', 1)[0] for sql in writes
+            if '"recipes_ingredientrecipe"' in sql.split(' (', 1)[0]
+        ]
+        self.assertEqual(ingredient_writes, ['DELETE', 'UPDATE', 'INSERT'])
+        self.assertFalse(
+            [sql for sql in writes if '"recipes_recipe_tags"' in sql])
+        # Вставляется одна строка - только новый ингредиент.
+        [insert] = [
+            sql for sql in writes
+            if sql.startswith('INSERT INTO "recipes_ingredientrecipe"')
+        ]
+        self.assertNotIn('), (', insert)
+        after = self.get_rows()
+        self.assertEqual(
+            set(after), {self.milk.id, self.eggs.id, self.salt.id})
+        self.assertEqual(after[self.milk.id], (before[self.milk.id][0], 400))
+        self.assertEqual(after[self.eggs.id], before[self.eggs.id])
+        self.assertEqual(after[self.salt.id][1], 5)
+
+
+class ValidateIdsTest(FoodgramTestCase):
+
+    def test_duplicates_and_missing_in_one_query(self):
+        missing = Ingredient.objects.order_by('-pk').first().pk + 1
+        ids = [self.milk.id, self.eggs.id, self.milk.id, missing]
+        with self.assertNumQueries(1), self.assertRaises(
+            serializers.ValidationError
+        ) as context:
+            validate_ids(
+                ids, Ingredient, MESSAGE_INGREDIENTS_UNIQUE,
+                INGREDIENT_NOT_FOUND)
+        self.assertEqual(context.exception.detail, [
+            f'Ингредиенты не могут повторяться: {self.milk.id}.',
+            f'Указанные ингредиенты не найдены: {missing}.',
+        ])
+
+    def test_found_objects_are_returned(self):
+        with self.assertNumQueries(1):
+            found = validate_ids(
+                [self.milk.id, self.eggs.id], Ingredient,
+                MESSAGE_INGREDIENTS_UNIQUE, INGREDIENT_NOT_FOUND)
+        self.assertEqual(
+            found, {self.milk.id: self.milk, self.eggs.id: self.eggs})
@@ -0,0 +1,81 @@
+from django.urls import reverse
+
+from api.shopping_list import get_shopping_list
+from api.tests.base import FoodgramTestCase
+from recipes.models import ShoppingCart
+
+
+class ShoppingListTest(FoodgramTestCase):
+    """ Список покупок суммирует ингредиенты корзины одним запросом. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        pancakes = cls.create_recipe(
+            cls.author, 'Блины',
+            ingredients=((cls.milk, 500), (cls.flour, 200), (cls.eggs, 2)))
+        porridge = cls.create_recipe(
+            cls.author, 'Каша', ingredients=((cls.milk, 300),))
+        cls.create_recipe(cls.author, 'Омлет', ingredients=((cls.eggs, 3),))
+        for recipe in (pancakes, porridge):
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_aggregation(self):
+        with self.assertNumQueries(1):
+            rows = list(get_shopping_list(self.user))
+        self.assertEqual(rows, [
+            ('молоко', 'мл', 800),
+            ('мука', 'г', 200),
+            ('яйца', 'шт', 2),
+        ])
+
+    def test_empty_cart(self):
+        self.assertEqual(list(get_shopping_list(self.author)), [])
+
+    def test_download(self):
+        url = reverse('api:recipe-download-shopping-cart')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+            content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content, (
+            'Список покупок:\n'
+            'молоко (мл) - 800\n'
+            'мука (г) - 200\n'
+            'яйца (шт) - 2\n'
+        ))
+
+    def test_download_csv(self):
+        response = self.client.get(
+            reverse('api:recipe-download-shopping-cart'),
+            {'file_format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Ингредиент,Единица измерения,Количество')
+        self.assertEqual(
+            lines[1:], ['молоко,мл,800', 'мука,г,200', 'яйца,шт,2'])
+
+    def test_download_pdf(self):
+        url = reverse('api:recipe-download-shopping-cart')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'file_format': 'pdf'})
+            content = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="shopping_list.pdf"')
+        self.assertTrue(content.startswith(b'%PDF-'))
+        self.assertIn(b'DejaVuSans', content)
+
+    def test_unsupported_format(self):
+        response = self.client.get(
+            reverse('api:recipe-download-shopping-cart'),
+            {'file_format': 'docx'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['file_format'], 'Доступные форматы: txt, csv, pdf.')
+
+    def test_anonymous(self):
+        response = self.anon.get(
+            reverse('api:recipe-download-shopping-cart'))
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Subscription
+
+
+class SubscriptionsTest(FoodgramTestCase):
+    """ Лента подписок и параметр recipes_limit. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [
+            cls.create_recipe(cls.author, f'Рецепт {index}')
+            for index in range(3)
+        ]
+        Subscription.objects.create(user=cls.user, author=cls.author)
+
+    def test_recipes_limit(self):
+        url = reverse('api:users-subscriptions')
+        for limit, expected in (('2', 2), ('0', 0), (None, 3)):
+            with self.subTest(limit=limit):
+                params = {} if limit is None else {'recipes_limit': limit}
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                author = response.data['results'][0]
+                self.assertEqual(len(author['recipes']), expected)
+                self.assertEqual(author['recipes_count'], 3)
+
+    def test_recipes_load_short_fields(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('api:users-subscriptions'))
+        self.assertEqual(response.status_code, 200)
+        [sql] = [
+            query['sql'] for query in context.captured_queries
+            if 'ROW_NUMBER()' in query['sql']
+        ]
+        select = sql[:sql.index(' FROM ')]
+        self.assertIn('"recipes_recipe"."cooking_time"', select)
+        for column in ('text', 'card', 'search_vector'):
+            self.assertNotIn(f'"recipes_recipe"."{column}"', select)
+
+    def test_invalid_recipes_limit(self):
+        url = reverse('api:users-subscriptions')
+        for limit in ('-1', 'abc', '1.5'):
+            with self.subTest(limit=limit):
+                response = self.client.get(url, {'recipes_limit': limit})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('recipes_limit', response.data)
+
+    def test_subscribe_validates_limit_first(self):
+        other = self.create_user('other')
+        url = reverse('api:users-subscribe', args=[other.id])
+        response = self.client.post(f'{url}?recipes_limit=-1')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            Subscription.objects.filter(user=self.user, author=other).exists())
+        response = self.client.post(f'{url}?recipes_limit=1')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['recipes'], [])
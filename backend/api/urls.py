@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -7,6 +8,7 @@ from api.views import (
     IngredientViewSet,
     RecipeViewSet,
 )
+from foodgram.async_views import async_reads
 
 app_name = 'api'
 
@@ -16,9 +18,19 @@ router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'ingredients', IngredientViewSet, basename='ingredient')
 router.register(r'recipes', RecipeViewSet, basename='recipe')
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_reads(router_urls, (
+        'tag-list',
+        'tag-detail',
+        'ingredient-list',
+        'ingredient-detail',
+        'recipe-list',
+        'recipe-detail',
+    ))
 
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
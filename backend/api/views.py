@@ -1,10 +1,14 @@
-from django.db.models import Count, Sum
-from django.http import HttpResponse
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Value
+from django.http import StreamingHttpResponse
 
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import (
     AllowAny,
     IsAuthenticated,
@@ -15,7 +19,8 @@ from rest_framework.reverse import reverse
 
 from djoser.views import UserViewSet
 
-from api.filters import IngredientFilter, RecipeFilter
+from api import shopping_list
+from api.filters import RecipeFilter
 from api.permissions import IsAdminAuthorOrReadOnly
 from api.pagination import LimitPagination
 from api.serializers import (
@@ -30,8 +35,24 @@ from api.serializers import (
     TagSerializer,
     UserSerializer,
     ShortenerSerializer,
+    get_recipes_limit,
+)
+from api.mixins import (
+    CachedResponseMixin,
+    RecipeFavoriteMixin,
+    SubscribeMixin,
+)
+from foodgram.constants import (
+    GENERATION_INGREDIENTS,
+    GENERATION_RECIPES,
+    GENERATION_TAGS,
+    INGREDIENT_FUZZY_PARAM,
+    INGREDIENT_SEARCH_PARAM,
+    MESSAGE_SHOPPING_LIST_FORMAT,
+    SHOPPING_LIST_DEFAULT_FORMAT,
+    SHOPPING_LIST_FORMAT_PARAM,
+    SHOPPING_LIST_FORMATS,
 )
-from api.mixins import SubscribeMixin, RecipeFavoriteMixin
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -39,42 +60,75 @@ from recipes.models import (
     ShoppingCart,
     Tag
 )
+from recipes.search import fuzzy_search, ingredient_index
 from users.models import User
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ Вьюсет для модели Tag. """
 
+    cache_generation = GENERATION_TAGS
+    cache_authenticated = True
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
     permission_classes = (IsAdminAuthorOrReadOnly,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
-    """ Вьюсет для модели Ingredient. """
+class IngredientViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    """ Вьюсет для модели Ingredient.
+    Список отдается из индекса в памяти, минуя кэш ответов.
+    Если по префиксу и подстроке ничего не найдено или передан
+    параметр fuzzy, выполняется нечеткий поиск по триграммам.
+    """
 
+    cache_generation = GENERATION_INGREDIENTS
+    cache_authenticated = True
     permission_classes = (AllowAny,)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientFilter,)
-    search_fields = ('^name',)
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(INGREDIENT_SEARCH_PARAM, '')
+        fuzzy = request.query_params.get(INGREDIENT_FUZZY_PARAM)
+        ingredients = [] if fuzzy else ingredient_index.search(name)
+        if name and not ingredients:
+            ingredients = fuzzy_search(name)
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
 
 
-class RecipeViewSet(viewsets.ModelViewSet, RecipeFavoriteMixin):
+class RecipeViewSet(
+    CachedResponseMixin, viewsets.ModelViewSet, RecipeFavoriteMixin
+):
     """Вьюсет для модели Recipe."""
 
+    cache_generation = GENERATION_RECIPES
     queryset = Recipe.objects.all()
     pagination_class = LimitPagination
     permission_classes = (IsAdminAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Recipe.objects.with_cards(self.request.user)
+        return super().get_queryset()
+
     def perform_create(self, serializer):
         return serializer.save(author=self.request.user)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Строка блокируется до сбора каскада: избранное и корзина,
+        # добавленные параллельно, либо попадут в каскад, либо
+        # увидят рецепт удаленным.
+        list(Recipe.objects.select_for_update().filter(
+            pk=instance.pk).values_list('pk', flat=True))
+        instance.delete()
+
     def get_serializer_class(self):
-        if self.request.method in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve'):
             return RecipeGetSerializer
         elif self.action == 'get_link':
             return ShortenerSerializer
@@ -90,7 +144,7 @@ class RecipeViewSet(viewsets.ModelViewSet, RecipeFavoriteMixin):
     )
     def get_link(self, request, pk=None):
         """Получение короткой ссылки на рецепт"""
-        self.get_object()
+        get_object_or_404(Recipe.objects.only('pk'), pk=pk)
         original_url = request.META.get('HTTP_REFERER')
         if original_url is None:
             url = reverse('api:recipe-detail', kwargs={'pk': pk})
@@ -116,33 +170,61 @@ class RecipeViewSet(viewsets.ModelViewSet, RecipeFavoriteMixin):
             return self.add_recipe(request, pk, ShoppingCartSerializer)
         return self.remove_recipe(request, pk, ShoppingCart)
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+        url_name='favorite-bulk',
+    )
+    def favorite_bulk(self, request):
+        """ Массовое добавление и удаление рецептов в избранном. """
+        if request.method == 'POST':
+            return self.add_recipes(request, Favorite)
+        return self.remove_recipes(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+    )
+    def shopping_cart_bulk(self, request):
+        """ Массовое добавление и удаление рецептов в корзине. """
+        if request.method == 'POST':
+            return self.add_recipes(request, ShoppingCart)
+        return self.remove_recipes(request, ShoppingCart)
+
     @action(
         detail=False,
         methods=['get'],
         permission_classes=(IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        ingredient_lst = ShoppingCart.objects.filter(
-            user=request.user
-        ).values_list(
-            'recipe_id__ingredients__name',
-            'recipe_id__ingredients__measurement_unit',
-            Sum('recipe_id__ingredients__amount_ingredients__amount'))
-        shopping_list = ['Список покупок:']
-        ingredient_lst = set(ingredient_lst)
-        for ingredient in ingredient_lst:
-            shopping_list.append('{} ({}) - {}'.format(*ingredient))
-        response = HttpResponse('\n'.join(shopping_list),
-                                content_type='text/plain')
-        response[
-            'Content-Disposition'] = 'attachment; filename="shopping_list.txt"'
+        """ Список покупок в формате txt, csv или pdf. """
+        file_format = request.query_params.get(
+            SHOPPING_LIST_FORMAT_PARAM, SHOPPING_LIST_DEFAULT_FORMAT)
+        if file_format not in SHOPPING_LIST_FORMATS:
+            message = MESSAGE_SHOPPING_LIST_FORMAT.format(
+                formats=', '.join(SHOPPING_LIST_FORMATS))
+            return Response(
+                {SHOPPING_LIST_FORMAT_PARAM: message},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        response = StreamingHttpResponse(
+            shopping_list.RENDERERS[file_format](request.user),
+            content_type=SHOPPING_LIST_FORMATS[file_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{file_format}"')
         return response
 
 
 class UserViewSet(UserViewSet, SubscribeMixin):
     """Вьюсет для модели User."""
 
-    queryset = User.objects.annotate(recipes_count=Count('recipes'))
+    queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = LimitPagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
@@ -170,7 +252,8 @@ class UserViewSet(UserViewSet, SubscribeMixin):
     @avatar.mapping.delete
     def delete_avatar(self, request, *args, **kwargs):
         user = self.request.user
-        user.avatar.delete()
+        user.avatar.delete(save=False)
+        user.save(update_fields=('avatar',))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['post', 'delete'])
@@ -181,8 +264,22 @@ class UserViewSet(UserViewSet, SubscribeMixin):
 
     @action(detail=False, methods=['get'])
     def subscriptions(self, request):
-        authors = User.objects.filter(subscribers__user=request.user)
+        limit = get_recipes_limit(request)
+        authors = User.objects.filter(
+            subscribing__user=request.user
+        ).annotate(is_subscribed=Value(True))
         page = self.paginate_queryset(authors)
+        recipes_by_author = defaultdict(list)
+        for recipe in Recipe.objects.top_per_author(
+            [author.id for author in page], limit
+        ).only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time',
+            'author_id'
+        ):
+            recipes_by_author[recipe.author_id].append(recipe)
         serializer = SubscriptionReadSerializer(
-            page, many=True, context={'request': request})
+            page, many=True, context={
+                'request': request,
+                'recipes_by_author': recipes_by_author,
+            })
         return self.get_paginated_response(serializer.data)
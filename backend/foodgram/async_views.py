@@ -0,0 +1,82 @@
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.urls import URLPattern
+
+from foodgram.constants import ASYNC_READ_CLOSE_TIMEOUT, ASYNC_READ_METHODS
+from foodgram.metrics import call_measured
+from foodgram.middleware import check_connections
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_READ_WORKERS, thread_name_prefix='reads')
+
+
+def run_view(view, request, *args, **kwargs):
+    """ Выполняет синхронное представление в потоке пула.
+    Каждый поток держит свое соединение с базой, поэтому
+    его срок жизни и работоспособность проверяются здесь,
+    как это делают сигналы запроса в WSGI.
+    """
+    close_old_connections()
+    check_connections()
+    try:
+        return call_measured(view, request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def close_connections():
+    """ Закрывает соединения с базой во всех потоках пула:
+    задачи ждут друг друга на барьере, поэтому каждая попадает
+    в свой поток. Вызывается при остановке процесса и в тестах.
+    """
+    barrier = threading.Barrier(settings.ASYNC_READ_WORKERS)
+
+    def close():
+        try:
+            barrier.wait(ASYNC_READ_CLOSE_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+        connections.close_all()
+
+    wait([
+        executor.submit(close)
+        for _ in range(settings.ASYNC_READ_WORKERS)
+    ])
+
+
+def async_view(view):
+    """ Асинхронная обертка над представлением: чтение выполняется
+    в ограниченном пуле потоков, не занимая цикл событий, остальные
+    методы - в общем потоке для синхронного кода, как в Django.
+    """
+    read = sync_to_async(
+        functools.partial(run_view, view), thread_sensitive=False,
+        executor=executor)
+    write = sync_to_async(functools.partial(call_measured, view))
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in ASYNC_READ_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+    return wrapper
+
+
+def async_reads(patterns, names):
+    """ Заменяет представления маршрутов с указанными именами
+    асинхронными обертками, сохраняя шаблоны и имена маршрутов.
+    """
+    return [
+        URLPattern(
+            pattern.pattern, async_view(pattern.callback),
+            pattern.default_args, pattern.name
+        )
+        if isinstance(pattern, URLPattern) and pattern.name in names
+        else pattern
+        for pattern in patterns
+    ]
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+class LocalTTLCache:
+    """ Ограниченный LRU-кэш в памяти процесса
+    с временем жизни записей.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def get_generation_key(name):
+    return f'generation:{name}'
+
+
+def get_generation(name):
+    """ Возвращает текущее поколение данных и время его смены.
+    Если счетчик вытеснен из кэша, он создается заново со значением,
+    которое не совпадает ни с одним из прежних.
+    """
+    key = get_generation_key(name)
+    values = cache.get_many((key, f'{key}:modified'))
+    if key in values:
+        return values[key], values.get(f'{key}:modified', time.time())
+    now = time.time()
+    cache.add(key, time.time_ns(), timeout=None)
+    cache.add(f'{key}:modified', now, timeout=None)
+    return cache.get(key), now
+
+
+def bump_generation(*names):
+    """ Сдвигает поколения, делая недействительными ответы в кэше. """
+    now = time.time()
+    for name in names:
+        key = get_generation_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+        cache.set(f'{key}:modified', now, timeout=None)
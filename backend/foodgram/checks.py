@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """ Метрики, кэш ответов и токенов и поколения данных
+    согласуются между процессами только через общий кэш.
+    """
+    if settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Warning(
+        'Кэш по умолчанию не общий для процессов: /metrics покажет '
+        'метрики одного процесса, а сброс кэшей не дойдет до остальных.',
+        hint='Задайте CACHE_BACKEND и CACHE_LOCATION, например Redis.',
+        id='foodgram.W001',
+    )]
@@ -12,10 +12,19 @@ MAX_LENGTH_SLUG_NAME = 32
 MAX_LENGTH_RECIPE_NAME = 256
 COOKING_TIME_MIN = 1
 MESSAGE_COOKING_TIME = _('Время приготовления не может быть меньше минуты.')
-MESSAGE_TAGS_UNIQUE = _('Теги не могут повторяться!')
+MESSAGE_TAGS_UNIQUE = _('Теги не могут повторяться: {ids}.')
 MESSAGE_NOT_TAGS = _('Не указаны тэги')
-INGREDIENT_NOT_FOUND = _('Указанный ингредиент не найден.')
+TAGS_NOT_FOUND = _('Указанные теги не найдены: {ids}.')
+MESSAGE_INGREDIENTS_UNIQUE = _('Ингредиенты не могут повторяться: {ids}.')
+INGREDIENT_NOT_FOUND = _('Указанные ингредиенты не найдены: {ids}.')
 MESSAGE_AMOUNT = _('Количество должно быть равно хотя бы одному.')
+MESSAGE_RECIPE_NOT_ADDED = _('Рецепт не был добавлен.')
+MESSAGE_SHOPPING_LIST_FORMAT = _('Доступные форматы: {formats}.')
+MESSAGE_IMAGE_INVALID = _('Загрузите корректное изображение в base64.')
+MESSAGE_IMAGE_TYPE = _('Допустимые форматы изображений: {formats}.')
+MESSAGE_IMAGE_SIZE = _('Размер изображения не должен превышать {size} МБ.')
+MESSAGE_IMAGE_DIMENSIONS = _(
+    'Изображение не должно быть больше {width}x{height} пикселей.')
 INLINE_EXTRA = 0
 INGREDIENT_AMOUNT_MIN = 1
 MIN_NUM = 1
@@ -23,4 +32,82 @@ PAGE_SIZE = 6
 MIN_HASH_GEN = 8
 MAX_HASH_GEN = 10
 MAX_HASH_LENGTH = 15
+SHORT_LINK_HASH_LENGTH = 10
 URL_MAX_LENGTH = 256
+SHOPPING_LIST_FORMAT_PARAM = 'file_format'
+SHOPPING_LIST_FORMATS = {
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+SHOPPING_LIST_DEFAULT_FORMAT = 'txt'
+SHOPPING_LIST_CHUNK_SIZE = 500
+SHOPPING_LIST_PDF_FONT = 'DejaVuSans'
+SHOPPING_LIST_PDF_FONT_SIZE = 12
+SHOPPING_LIST_PDF_TITLE_SIZE = 16
+SHOPPING_LIST_PDF_LEADING = 18
+SHOPPING_LIST_PDF_MARGIN = 56
+INGREDIENT_SEARCH_PARAM = 'name'
+INGREDIENT_INDEX_TTL = 300
+INGREDIENT_FUZZY_PARAM = 'fuzzy'
+INGREDIENT_FUZZY_LIMIT = 20
+INGREDIENT_FUZZY_THRESHOLD = 0.15
+IMPORT_BATCH_SIZE = 1000
+IMPORT_READ_CHUNK_SIZE = 64 * 1024
+SHORT_LINK_CACHE_ALIAS = 'default'
+SHORT_LINK_CACHE_TTL = 60 * 60 * 24
+SHORT_LINK_MISSING_TTL = 60 * 5
+SHORT_LINK_LOCAL_CACHE_SIZE = 10000
+SHORT_LINK_LOCAL_CACHE_TTL = 60
+SHORT_LINK_MAX_AGE = 60 * 60
+RESPONSE_CACHE_TTL = 60 * 60
+GENERATION_TAGS = 'tags'
+GENERATION_INGREDIENTS = 'ingredients'
+GENERATION_RECIPES = 'recipes'
+SEARCH_CONFIG = 'russian'
+IMAGE_VARIANTS = {
+    'thumbnail': 160,
+    'card': 480,
+    'full': 1280,
+}
+IMAGE_VARIANT_FORMAT = 'WEBP'
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_WORKERS = 2
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_MAX_WIDTH = 8000
+IMAGE_MAX_HEIGHT = 8000
+IMAGE_DECODE_CHUNK_SIZE = 64 * 1024
+AUTH_TOKEN_CACHE_TTL = 60 * 5
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 10000
+AUTH_TOKEN_LOCAL_CACHE_TTL = 10
+ASYNC_READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ASYNC_READ_CLOSE_TIMEOUT = 5
+BENCHMARK_EMAIL_DOMAIN = 'bench.local'
+BENCHMARK_PASSWORD = 'bench-password'
+BENCHMARK_SEED = 42
+BENCHMARK_REQUESTS = 2000
+BENCHMARK_CONCURRENCY = 1
+BENCHMARK_TOKENS = 50
+BENCHMARK_TOLERANCE = 0.25
+BENCHMARK_MIN_SAMPLES = 20
+BENCHMARK_NOISE_MS = 2
+LOAD_TEST_CONCURRENCY = 16
+LOAD_TEST_DURATION = 20
+LOAD_TEST_PATHS = 400
+METRICS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float('inf'))
+METRICS_FLUSH_INTERVAL = 10
+METRICS_WORKER_TTL = 60
+METRICS_FOLD_LOCK_TTL = 10
+METRICS_SLOW_REQUEST = 0.5
+METRICS_SLOW_SAMPLE_RATE = 0.1
+METRICS_SLOW_TOP_QUERIES = 5
+RECIPE_CARD_VERSION = 1
+RECIPE_CARD_BATCH_SIZE = 500
+BULK_RECIPES_LIMIT = 100
+BULK_ADDED = 'added'
+BULK_EXISTS = 'exists'
+BULK_NOT_FOUND = 'not_found'
+BULK_REMOVED = 'removed'
+BULK_ABSENT = 'absent'
+BENCHMARK_BULK_SIZE = 20
@@ -0,0 +1,133 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from foodgram.constants import (
+    IMAGE_VARIANT_FORMAT,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANTS,
+    IMAGE_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=IMAGE_WORKERS, thread_name_prefix='images')
+
+
+def make_variants(name):
+    """ Сохраняет уменьшенные копии изображения без метаданных.
+    Возвращает словарь с исходным именем и путями вариантов.
+    """
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    base, _ = os.path.splitext(name)
+    variants = {'source': name}
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(
+            buffer, IMAGE_VARIANT_FORMAT, quality=IMAGE_VARIANT_QUALITY)
+        path = f'{base}_{variant}.{IMAGE_VARIANT_FORMAT.lower()}'
+        default_storage.delete(path)
+        variants[variant] = default_storage.save(
+            path, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def delete_variants(variants, keep=()):
+    """ Удаляет файлы вариантов, кроме путей из keep. """
+    for variant, path in variants.items():
+        if variant != 'source' and path not in keep:
+            default_storage.delete(path)
+
+
+def process_image(model, pk, field, variants_field, on_done=None):
+    """ Задача фонового потока: строит варианты и сохраняет их,
+    только если изображение объекта за это время не сменилось.
+    Файлы вариантов прежнего изображения удаляются; у удаленного
+    изображения варианты просто очищаются.
+    """
+    try:
+        row = model.objects.filter(pk=pk).values_list(
+            field, variants_field).first()
+        if row is None:
+            return
+        name, previous = row
+        variants = make_variants(name) if name else {}
+        updated = model.objects.filter(pk=pk, **{field: name}).update(
+            **{variants_field: variants})
+        if not updated:
+            # Изображение сменилось, пока строились варианты.
+            current = model.objects.filter(pk=pk).values_list(
+                variants_field, flat=True).first() or {}
+            delete_variants(variants, keep=current.values())
+            return
+        delete_variants(previous, keep=variants.values())
+        if on_done is not None:
+            on_done()
+    except FileNotFoundError:
+        # Изображение успели заменить или удалить.
+        pass
+    except Exception:
+        logger.exception('Image processing failed for %s %s', model, pk)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(instance, field, variants_field, on_done=None):
+    """ Ставит в очередь построение вариантов, если изображение
+    объекта изменилось с прошлой обработки.
+    """
+    name = getattr(instance, field).name or ''
+    if getattr(instance, variants_field).get('source', '') == name:
+        return
+    transaction.on_commit(lambda: executor.submit(
+        process_image, type(instance), instance.pk, field, variants_field,
+        on_done
+    ))
+
+
+def get_variant_url(file, variants, variant, request):
+    """ Абсолютная ссылка на вариант изображения.
+    Пока варианты не готовы, отдается исходное изображение.
+    """
+    return build_variant_url(file.name, variants, variant, request)
+
+
+def get_variant_urls(file, variants, request):
+    """ Ссылки на все варианты изображения. """
+    return build_variant_urls(file.name, variants, request)
+
+
+def build_image_url(name, request):
+    """ Абсолютная ссылка на файл хранилища по его имени. """
+    if not name:
+        return None
+    return request.build_absolute_uri(default_storage.url(name))
+
+
+def build_variant_url(name, variants, variant, request):
+    """ То же, что get_variant_url, по имени файла в хранилище. """
+    if not name or variants.get('source') != name:
+        return build_image_url(name, request)
+    return build_image_url(variants[variant], request)
+
+
+def build_variant_urls(name, variants, request):
+    if not name:
+        return None
+    return {
+        variant: build_variant_url(name, variants, variant, request)
+        for variant in IMAGE_VARIANTS
+    }
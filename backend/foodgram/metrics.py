@@ -0,0 +1,373 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from foodgram.constants import (
+    METRICS_BUCKETS,
+    METRICS_FLUSH_INTERVAL,
+    METRICS_FOLD_LOCK_TTL,
+    METRICS_SLOW_REQUEST,
+    METRICS_SLOW_SAMPLE_RATE,
+    METRICS_SLOW_TOP_QUERIES,
+    METRICS_WORKER_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+WORKERS_KEY = 'metrics:workers'
+DEAD_KEY = 'metrics:dead'
+FOLD_LOCK_KEY = 'metrics:fold-lock'
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """ SQL без параметров и литералов: запросы, отличающиеся
+    только значениями, получают одинаковый отпечаток.
+    """
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    sql = LITERAL_RE.sub('?', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """ Замеры одного запроса. Экземпляр служит оберткой
+    execute_wrapper и записывает каждый SQL-запрос с его временем.
+    """
+
+    __slots__ = ('started', 'queries', 'db_time', 'render_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_time += duration
+            self.queries.append((sql, duration))
+
+    def server_timing(self, total):
+        app = total - self.db_time - self.render_time
+        return (
+            f'db;dur={self.db_time * 1000:.2f};'
+            f'desc="{len(self.queries)} queries", '
+            f'render;dur={self.render_time * 1000:.2f}, '
+            f'app;dur={app * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+
+    def top_queries(self):
+        stats = {}
+        for sql, duration in self.queries:
+            key = fingerprint(sql)
+            count, total = stats.get(key, (0, 0.0))
+            stats[key] = (count + 1, total + duration)
+        return sorted(
+            stats.items(), key=lambda item: item[1][1], reverse=True
+        )[:METRICS_SLOW_TOP_QUERIES]
+
+
+thread_wrappers = threading.local()
+
+
+def get_execute_wrappers():
+    """ Списки execute_wrappers соединений текущего потока.
+    Соединения привязаны к потоку и живут вместе с ним, а обращение
+    к connections дороже самого замера, поэтому списки запоминаются.
+    """
+    wrappers = getattr(thread_wrappers, 'lists', None)
+    if wrappers is None:
+        wrappers = thread_wrappers.lists = [
+            connection.execute_wrappers for connection in connections.all()
+        ]
+    return wrappers
+
+
+@contextmanager
+def collect_queries(metrics):
+    """ Записывает запросы ко всем базам текущего потока в metrics,
+    как connection.execute_wrapper, но без обращения к connections.
+    """
+    wrappers = get_execute_wrappers()
+    for execute_wrappers in wrappers:
+        execute_wrappers.append(metrics)
+    try:
+        yield
+    finally:
+        for execute_wrappers in wrappers:
+            execute_wrappers.pop()
+
+
+def call_measured(view, request, *args, **kwargs):
+    """ Вызывает представление в другом потоке, учитывая его запросы
+    к базе в замерах, начатых RequestMetricsMiddleware.
+    """
+    metrics = getattr(request, 'metrics', None)
+    if metrics is None:
+        return view(request, *args, **kwargs)
+    with collect_queries(metrics):
+        return view(request, *args, **kwargs)
+
+
+def empty_stats():
+    return [0, 0.0, 0.0, 0, 0.0, [0] * len(METRICS_BUCKETS)]
+
+
+def merge(total, snapshot):
+    """ Добавляет снимок {(view, method): stats} к total. """
+    for key, stats in snapshot.items():
+        current = total.setdefault(key, empty_stats())
+        for index in range(5):
+            current[index] += stats[index]
+        for index, count in enumerate(stats[5]):
+            current[5][index] += count
+    return total
+
+
+def snapshot_key(slot):
+    return f'metrics:worker:{slot}'
+
+
+def alive_key(slot):
+    return f'metrics:alive:{slot}'
+
+
+class MetricsRegistry:
+    """ Агрегаты по представлениям в памяти процесса. Каждый процесс
+    gunicorn получает номер через атомарный cache.incr и раз
+    в METRICS_FLUSH_INTERVAL секунд из фонового потока пишет в общий
+    кэш снимок без срока жизни и отметку о том, что он жив, со сроком
+    METRICS_WORKER_TTL. Эндпоинт метрик суммирует снимки всех
+    процессов, а снимки умерших переносит в общий итог, поэтому
+    счетчики не уменьшаются ни при простое, ни при перезапуске
+    процессов. Без общего кэша (LocMemCache) каждый процесс видит
+    только свои метрики.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.pid = None
+        self.slot = None
+
+    def start(self):
+        """ Регистрирует процесс и запускает поток сброса снимков.
+        После fork у процесса новый pid: агрегаты родителя
+        отбрасываются, процесс получает свой номер и свой поток.
+        """
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.views = {}
+        self.register()
+        cache.set(snapshot_key(self.slot), {}, None)
+        self.flush()
+        threading.Thread(
+            target=self.run_flusher, name='metrics-flush', daemon=True
+        ).start()
+
+    def run_flusher(self):
+        pid = os.getpid()
+        while self.pid == pid:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Metrics snapshot flush failed')
+
+    def observe(self, view, method, metrics, total):
+        self.start()
+        key = (view, method)
+        with self.lock:
+            stats = self.views.get(key)
+            if stats is None:
+                stats = self.views[key] = empty_stats()
+            stats[0] += 1
+            stats[1] += total
+            stats[2] += metrics.db_time
+            stats[3] += len(metrics.queries)
+            stats[4] += metrics.render_time
+            for index, bound in enumerate(METRICS_BUCKETS):
+                if total <= bound:
+                    stats[5][index] += 1
+                    break
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                key: stats[:5] + [list(stats[5])]
+                for key, stats in self.views.items()
+            }
+
+    def register(self):
+        cache.add(WORKERS_KEY, 0, None)
+        self.slot = cache.incr(WORKERS_KEY)
+
+    def flush(self):
+        """ Пишет снимок и отметку о том, что процесс жив. Если снимка
+        в кэше нет, процесс долго не отвечал и его снимок уже
+        перенесен в итог умерших: агрегаты начинаются заново под
+        новым номером, чтобы не учитываться дважды.
+        """
+        if self.slot is None:
+            return
+        if cache.get(snapshot_key(self.slot)) is None:
+            with self.lock:
+                self.views = {}
+            self.register()
+        cache.set(snapshot_key(self.slot), self.snapshot(), None)
+        cache.set(alive_key(self.slot), self.pid, METRICS_WORKER_TTL)
+
+    def collect(self):
+        """ Сумма снимков всех процессов и итога умерших; свой
+        снимок - актуальный. Итог умерших хранит номера уже
+        перенесенных процессов, чтобы снимок, который еще не удален,
+        не учитывался дважды.
+        """
+        self.start()
+        slots = [
+            slot for slot in range(1, (cache.get(WORKERS_KEY) or 0) + 1)
+            if slot != self.slot
+        ]
+        found = cache.get_many(
+            [DEAD_KEY]
+            + [snapshot_key(slot) for slot in slots]
+            + [alive_key(slot) for slot in slots]
+        )
+        dead = found.get(DEAD_KEY) or {'slots': set(), 'views': {}}
+        total = merge(merge({}, dead['views']), self.snapshot())
+        finished = []
+        for slot in slots:
+            snapshot = found.get(snapshot_key(slot))
+            if snapshot is None or slot in dead['slots']:
+                continue
+            merge(total, snapshot)
+            if alive_key(slot) not in found:
+                finished.append(slot)
+        if finished:
+            self.fold(finished)
+        return total
+
+    def fold(self, slots):
+        """ Переносит снимки умерших процессов в общий итог под
+        блокировкой: итог и номера пишутся до удаления снимков.
+        """
+        if not cache.add(FOLD_LOCK_KEY, self.pid, METRICS_FOLD_LOCK_TTL):
+            return
+        try:
+            dead = cache.get(DEAD_KEY) or {'slots': set(), 'views': {}}
+            slots = set(slots) | dead['slots']
+            keys = [snapshot_key(slot) for slot in slots]
+            found = cache.get_many(keys)
+            for slot in slots - dead['slots']:
+                if snapshot_key(slot) in found:
+                    merge(dead['views'], found[snapshot_key(slot)])
+            # Номера нужны, только пока их снимки не удалены.
+            dead['slots'] = {
+                slot for slot in slots if snapshot_key(slot) in found}
+            cache.set(DEAD_KEY, dead, None)
+            cache.delete_many(keys)
+        finally:
+            cache.delete(FOLD_LOCK_KEY)
+
+
+registry = MetricsRegistry()
+
+
+def record(request, response, metrics):
+    """ Учитывает запрос в метриках и пишет в лог часть медленных
+    запросов вместе с самыми дорогими SQL-отпечатками.
+    """
+    total = time.perf_counter() - metrics.started
+    match = request.resolver_match
+    view = match.view_name if match else '<unresolved>'
+    registry.observe(view, request.method, metrics, total)
+    if (total >= METRICS_SLOW_REQUEST
+            and random.random() < METRICS_SLOW_SAMPLE_RATE):
+        logger.warning(
+            'Slow request %s %s (%s): %.0f ms, db %.0f ms, %d queries\n%s',
+            request.method, request.get_full_path(), view, total * 1000,
+            metrics.db_time * 1000, len(metrics.queries),
+            '\n'.join(
+                f'  {count}x {duration * 1000:.1f} ms  {sql}'
+                for sql, (count, duration) in metrics.top_queries()
+            )
+        )
+    return total
+
+
+def render_metrics():
+    """ Метрики в текстовом формате Prometheus. """
+    lines = []
+    stats = sorted(registry.collect().items())
+
+    def label(view, method, le=None):
+        extra = '' if le is None else f',le="{le}"'
+        return f'{{view="{view}",method="{method}"{extra}}}'
+
+    lines.append('# TYPE foodgram_request_duration_seconds histogram')
+    for (view, method), (count, total, *_, buckets) in stats:
+        cumulative = 0
+        for bound, bucket in zip(METRICS_BUCKETS, buckets):
+            cumulative += bucket
+            le = '+Inf' if bound == float('inf') else bound
+            lines.append(
+                'foodgram_request_duration_seconds_bucket'
+                f'{label(view, method, le)} {cumulative}')
+        lines.append(
+            f'foodgram_request_duration_seconds_sum{label(view, method)} '
+            f'{total:.6f}')
+        lines.append(
+            f'foodgram_request_duration_seconds_count{label(view, method)} '
+            f'{count}')
+    for name, index, kind in (
+        ('foodgram_db_queries_total', 3, 'counter'),
+        ('foodgram_db_duration_seconds_total', 2, 'counter'),
+        ('foodgram_render_duration_seconds_total', 4, 'counter'),
+    ):
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(
+            f'{name}{label(view, method)} {values[index]:g}'
+            for (view, method), values in stats
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def has_metrics_access(request):
+    """ Метрики отдаются по токену METRICS_TOKEN или на адреса
+    из INTERNAL_IPS.
+    """
+    token = settings.METRICS_TOKEN
+    if token and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+
+
+def metrics_view(request):
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
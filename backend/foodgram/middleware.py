@@ -0,0 +1,79 @@
+import asyncio
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from foodgram.metrics import RequestMetrics, collect_queries, record
+
+
+def check_connections():
+    """ Закрывает соединения текущего потока, разорванные сервером
+    или пулером между запросами; Django откроет новые при первом
+    обращении.
+    """
+    for connection in connections.all():
+        if (connection.connection is not None
+                and not connection.in_atomic_block
+                and not connection.is_usable()):
+            connection.close()
+
+
+class ConnectionHealthCheckMiddleware:
+    """ Проверка постоянных соединений с базой перед запросом.
+    В асинхронном режиме база используется только из потоков,
+    которые проверяют соединения сами, поэтому запрос пропускается.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        check_connections()
+        return self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """ Замеры запроса: число и время SQL-запросов, время рендеринга
+    ответа и общее время. Итоги попадают в метрики по представлениям
+    и, если включено SERVER_TIMING, в заголовок Server-Timing.
+    В асинхронном режиме запросы к базе учитываются только
+    в представлениях, обернутых foodgram.async_views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = settings.SERVER_TIMING
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = request.metrics = RequestMetrics()
+        with collect_queries(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        response = await self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total = record(request, response, metrics)
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing(total)
+        return response
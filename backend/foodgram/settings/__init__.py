@@ -0,0 +1,10 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+if os.getenv('DJANGO_ENV', 'prod') == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    from .prod import *  # noqa: F401,F403
@@ -0,0 +1,22 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+SECRET_KEY = os.getenv('SECRET_KEY', '123')
+
+DEBUG = os.getenv('DEBUG', 'True') == 'True'
+
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'True') == 'True'
+
+INSTALLED_APPS = INSTALLED_APPS + [
+    'debug_toolbar',
+]
+
+MIDDLEWARE = MIDDLEWARE + [
+    'debug_toolbar.middleware.DebugToolbarMiddleware',
+]
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
@@ -0,0 +1,21 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, MIDDLEWARE
+
+SECRET_KEY = os.environ['SECRET_KEY']
+
+# Постоянные соединения с базой; перед запросом соединение,
+# оставшееся от прошлого запроса, проверяется на работоспособность.
+DATABASES['default']['CONN_MAX_AGE'] = int(
+    os.getenv('DB_CONN_MAX_AGE', 60))
+
+if os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True':
+    MIDDLEWARE = [
+        'foodgram.middleware.ConnectionHealthCheckMiddleware',
+    ] + MIDDLEWARE
+
+# PgBouncer в режиме пулинга транзакций: серверные курсоры живут
+# дольше транзакции и ломаются при смене соединения.
+if os.getenv('DB_POOLER') == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
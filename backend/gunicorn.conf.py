@@ -0,0 +1,16 @@
+import os
+
+bind = '0.0.0.0:7000'
+
+# С ASYNC_READ_VIEWS=True бэкенд запускается под ASGI, иначе
+# асинхронные обертки представлений не используются.
+if os.getenv('ASYNC_READ_VIEWS', 'False') == 'True':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'foodgram.asgi:application'
+
+    def worker_exit(server, worker):
+        from foodgram.async_views import close_connections
+
+        close_connections()
+else:
+    wsgi_app = 'foodgram.wsgi:application'
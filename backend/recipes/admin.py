@@ -51,8 +51,9 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientRecipeInline, TagInline,)
     empty_value_display = '-пусто-'
 
+    @admin.display(description='В избранном', ordering='favorites_count')
     def likes(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
 
 @admin.register(ShoppingCart)
@@ -0,0 +1,78 @@
+from django.db import transaction
+
+from foodgram.constants import RECIPE_CARD_BATCH_SIZE, RECIPE_CARD_VERSION
+from recipes.models import Recipe
+
+TAG_FIELDS = ('id', 'name', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit', 'amount')
+
+
+def build_card(recipe):
+    """ Данные рецепта, не зависящие от пользователя и запроса.
+    Теги и ингредиенты хранятся строками в порядке TAG_FIELDS
+    и INGREDIENT_FIELDS: jsonb не сохраняет порядок ключей.
+    Изображения хранятся именами файлов, ссылки строятся при выдаче.
+    """
+    author = recipe.author
+    return {
+        'version': RECIPE_CARD_VERSION,
+        'id': recipe.id,
+        'tags': [
+            (tag.id, tag.name, tag.slug) for tag in recipe.tags.all()
+        ],
+        'author': {
+            'id': author.id,
+            'email': author.email,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'avatar': author.avatar.name or None,
+            'avatar_variants': author.avatar_variants,
+        },
+        'ingredients': [
+            (
+                item.ingredient.id,
+                item.ingredient.name,
+                item.ingredient.measurement_unit,
+                item.amount,
+            )
+            for item in recipe.amount_ingredients.all()
+        ],
+        'name': recipe.name,
+        'image': recipe.image.name or None,
+        'image_variants': recipe.image_variants,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+    }
+
+
+def get_card(recipe):
+    """ Карточка рецепта; устаревшая или еще не построенная
+    собирается заново из базы.
+    """
+    if recipe.card.get('version') == RECIPE_CARD_VERSION:
+        return recipe.card
+    return build_card(Recipe.objects.with_related().get(pk=recipe.pk))
+
+
+def rebuild_cards(queryset, batch_size=RECIPE_CARD_BATCH_SIZE):
+    """ Пересобирает карточки рецептов из queryset пачками
+    по batch_size и возвращает число обновленных рецептов.
+    Строки пачки блокируются до чтения данных: параллельные
+    пересборки одних рецептов выполняются по очереди, и последней
+    пишет та, что читала базу после всех изменений, поэтому
+    карточка, собранная раньше, не перезапишет более новую.
+    """
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        with transaction.atomic():
+            locked = list(Recipe.objects.filter(
+                pk__in=ids[start:start + batch_size]
+            ).order_by('pk').select_for_update().values_list(
+                'pk', flat=True))
+            recipes = list(
+                Recipe.objects.filter(pk__in=locked).with_related())
+            for recipe in recipes:
+                recipe.card = build_card(recipe)
+            Recipe.objects.bulk_update(recipes, ('card',))
+    return len(ids)
@@ -1,48 +1,140 @@
 import csv
 import json
-import os
+import time
+from pathlib import Path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
 
+from foodgram.cache import bump_generation
+from foodgram.constants import (
+    GENERATION_INGREDIENTS,
+    IMPORT_BATCH_SIZE,
+    IMPORT_READ_CHUNK_SIZE,
+)
 from recipes.models import Ingredient
+from recipes.search import ingredient_index
 
-DATA_DIR = os.path.join(settings.BASE_DIR, 'data')
-JSON_FILE_PATH = os.path.join(DATA_DIR, 'ingredients.json')
-CSV_FILE_PATH = os.path.join(DATA_DIR, 'ingredients.csv')
+DATA_DIR = Path(settings.BASE_DIR) / 'data'
+JSON_FILE_PATH = DATA_DIR / 'ingredients.json'
+CSV_FILE_PATH = DATA_DIR / 'ingredients.csv'
+
+
+def iter_json_array(file, chunk_size=IMPORT_READ_CHUNK_SIZE):
+    """ Элементы JSON-массива верхнего уровня по одному: файл читается
+    кусками по chunk_size, в памяти только недоразобранный остаток.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    expected = '['
+    need_more = False
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer or need_more:
+            if eof:
+                raise ValueError('Файл JSON оборван или поврежден.')
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            need_more = False
+            continue
+        if expected in ('first', ',') and buffer[0] == ']':
+            return
+        if expected in ('[', ','):
+            if buffer[0] != expected:
+                raise ValueError(
+                    f'Ожидался символ {expected!r}, получен {buffer[0]!r}.')
+            buffer = buffer[1:]
+            expected = 'first' if expected == '[' else 'item'
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            need_more = True
+            continue
+        if end == len(buffer) and not eof:
+            # Число на границе куска могло прочитаться не целиком.
+            need_more = True
+            continue
+        yield item
+        buffer = buffer[end:]
+        expected = ','
 
 
 def load_ingredients(file_path):
-    """Общая функция загрузки ингредиентов. """
+    """Общая функция загрузки ингредиентов.
+    Построчно отдает пары (название, единица измерения).
+    """
     if file_path.suffix == '.json':
         with open(file_path, encoding='utf-8') as f:
-            data = json.load(f)
-            return [(item["name"], item["measurement_unit"]) for item in data]
+            for item in iter_json_array(f):
+                yield item['name'], item['measurement_unit']
 
     elif file_path.suffix == '.csv':
         with open(file_path, newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader)
-            return list(reader)
+            for name, unit in csv.reader(f):
+                yield name, unit
 
     else:
-        raise ValueError("Unsupported file format")
+        raise ValueError(f'Unsupported file format: {file_path}')
 
 
 class Command(BaseCommand):
     help = 'Импортирование данных ингредиентов из JSON/CSV-файлов.'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            type=Path,
+            default=(JSON_FILE_PATH, CSV_FILE_PATH),
+            help='Пути к JSON/CSV-файлам с ингредиентами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество строк в одном INSERT.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        seen = set()
+        batch = []
+        total = 0
         try:
-            ingredients_from_json = load_ingredients(JSON_FILE_PATH)
-            ingredients_from_csv = load_ingredients(CSV_FILE_PATH)
-            all_ingredients = set(ingredients_from_json + ingredients_from_csv)
-            for name, unit in all_ingredients:
-                Ingredient.objects.get_or_create(name=name,
-                                                 measurement_unit=unit)
-
-            self.stdout.write(self.style.SUCCESS(
-                'Данные успешно импортированы'))
-
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(str(e)))
+            with transaction.atomic():
+                before = Ingredient.objects.count()
+                for path in options['paths']:
+                    for name, unit in load_ingredients(path):
+                        total += 1
+                        key = (name.strip(), unit.strip())
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        batch.append(Ingredient(
+                            name=key[0], measurement_unit=key[1]))
+                        if len(batch) >= batch_size:
+                            Ingredient.objects.bulk_create(
+                                batch, ignore_conflicts=True)
+                            batch = []
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                inserted = Ingredient.objects.count() - before
+        except (OSError, ValueError, KeyError, TypeError, csv.Error,
+                DatabaseError) as e:
+            raise CommandError(f'Ошибка импорта: {e!r}') from e
+
+        # bulk_create не отправляет сигналы, индекс и кэш
+        # ответов сбрасываются вручную.
+        ingredient_index.invalidate()
+        bump_generation(GENERATION_INGREDIENTS)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные успешно импортированы: добавлено {inserted}, '
+            f'пропущено {total - inserted} из {total} строк '
+            f'за {elapsed:.2f} с ({total / max(elapsed, 1e-6):.0f} строк/с)'
+        ))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.cache import bump_generation
+from foodgram.constants import GENERATION_RECIPES
+from foodgram.images import make_variants
+from recipes.cards import rebuild_cards
+from recipes.models import Recipe
+from users.models import User
+
+TARGETS = (
+    (Recipe, 'image', 'image_variants'),
+    (User, 'avatar', 'avatar_variants'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Построение недостающих вариантов изображений рецептов и аватаров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать варианты для всех изображений.',
+        )
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for model, field, variants_field in TARGETS:
+            rows = model.objects.exclude(
+                **{f'{field}__isnull': True}
+            ).exclude(**{field: ''}).values_list('pk', field, variants_field)
+            for pk, name, variants in rows.iterator():
+                if not options['force'] and variants.get('source') == name:
+                    continue
+                try:
+                    variants = make_variants(name)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f'{name}: {e}'))
+                    continue
+                processed += model.objects.filter(
+                    pk=pk, **{field: name}
+                ).update(**{variants_field: variants})
+        if processed:
+            rebuild_cards(Recipe.objects.all())
+        bump_generation(GENERATION_RECIPES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Варианты построены: {processed}, ошибок {failed}'
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from foodgram.cache import bump_generation
+from foodgram.constants import (
+    GENERATION_RECIPES,
+    RECIPE_CARD_BATCH_SIZE,
+    RECIPE_CARD_VERSION,
+)
+from recipes.cards import rebuild_cards
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Пересборка готовых карточек рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересобрать все карточки, а не только устаревшие.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECIPE_CARD_BATCH_SIZE,
+            help='Количество рецептов в одной пачке.',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.all()
+        if not options['force']:
+            recipes = recipes.filter(
+                Q(card__version__isnull=True)
+                | ~Q(card__version=RECIPE_CARD_VERSION)
+            )
+        rebuilt = rebuild_cards(recipes, options['batch_size'])
+        bump_generation(GENERATION_RECIPES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Карточки пересобраны: {rebuilt}'
+        ))
@@ -0,0 +1,219 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import CASCADE
+from rest_framework.authtoken.models import Token
+
+from foodgram.cache import bump_generation
+from foodgram.constants import (
+    BENCHMARK_EMAIL_DOMAIN,
+    BENCHMARK_PASSWORD,
+    BENCHMARK_SEED,
+    GENERATION_INGREDIENTS,
+    GENERATION_RECIPES,
+    GENERATION_TAGS,
+    IMPORT_BATCH_SIZE,
+)
+from recipes.cards import rebuild_cards
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Subscription,
+    Tag,
+)
+from users.authentication import invalidate_tokens
+from users.models import User
+
+BENCHMARK_TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Заполнение базы синтетическими данными для нагрузочного '
+            'тестирования. Данные прошлого запуска удаляются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument(
+            '--favorites', type=int, default=10,
+            help='Рецептов в избранном у каждого пользователя.')
+        parser.add_argument(
+            '--carts', type=int, default=3,
+            help='Рецептов в корзине у каждого пользователя.')
+        parser.add_argument(
+            '--subscriptions', type=int, default=5,
+            help='Подписок у каждого пользователя.')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--seed', type=int, default=BENCHMARK_SEED)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Только удалить синтетические данные.')
+
+    def bulk_create(self, model, objects):
+        return model.objects.bulk_create(
+            objects, batch_size=self.batch_size)
+
+    def chunks(self, items):
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    def clear(self):
+        """ Удаляет синтетических пользователей и все, что на них
+        ссылается, запросами DELETE по подзапросу без загрузки объектов
+        и сигналов на каждую строку. Связанные таблицы берутся из
+        обратных связей CASCADE моделей Recipe и User. Возвращает
+        число удаленных строк.
+        """
+        invalidate_tokens(*Token.objects.filter(
+            user__email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}'
+        ).values_list('key', flat=True))
+        quote = connection.ops.quote_name
+        users = (
+            f'SELECT id FROM {quote(User._meta.db_table)} '
+            f'WHERE email LIKE %s'
+        )
+        recipes = (
+            f'SELECT id FROM {quote(Recipe._meta.db_table)} '
+            f'WHERE author_id IN ({users})'
+        )
+        params = [f'%@{BENCHMARK_EMAIL_DOMAIN}']
+        deleted = 0
+        with connection.cursor() as cursor:
+            for model, subquery in ((Recipe, recipes), (User, users)):
+                targets = [
+                    (relation.related_model, relation.field.column)
+                    for relation in model._meta.get_fields(
+                        include_hidden=True)
+                    if (relation.one_to_many or relation.one_to_one)
+                    and relation.auto_created and not relation.concrete
+                    and relation.on_delete is CASCADE
+                ] + [(model, 'id')]
+                for target, column in targets:
+                    cursor.execute(
+                        f'DELETE FROM {quote(target._meta.db_table)} '
+                        f'WHERE {quote(column)} IN ({subquery})', params)
+                    deleted += cursor.rowcount
+        return deleted
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+        started = time.monotonic()
+        with transaction.atomic():
+            deleted = self.clear()
+            if options['clear']:
+                call_command('rebuild_counters', stdout=self.stdout)
+                transaction.on_commit(lambda: bump_generation(
+                    GENERATION_TAGS, GENERATION_INGREDIENTS,
+                    GENERATION_RECIPES))
+                self.stdout.write(self.style.SUCCESS(
+                    f'Удалено строк: {deleted}'))
+                return
+            ingredient_ids = list(
+                Ingredient.objects.values_list('id', flat=True))
+            if len(ingredient_ids) < options['ingredients_per_recipe']:
+                raise CommandError(
+                    'Недостаточно ингредиентов, сначала выполните '
+                    'import_ingredients.')
+            Tag.objects.bulk_create(
+                [Tag(name=name, slug=slug) for name, slug in BENCHMARK_TAGS],
+                ignore_conflicts=True)
+            tag_ids = list(Tag.objects.values_list('id', flat=True))
+            ingredient_names = dict(Ingredient.objects.values_list(
+                'id', 'name'))
+
+            # Строки создаются пачками по batch_size; в памяти
+            # держатся только id пользователей и рецептов.
+            password = make_password(BENCHMARK_PASSWORD)
+            user_ids = []
+            for numbers in self.chunks(range(options['users'])):
+                user_ids.extend(user.id for user in self.bulk_create(User, [
+                    User(
+                        email=f'bench{number}@{BENCHMARK_EMAIL_DOMAIN}',
+                        username=f'bench{number}',
+                        first_name=f'Имя{number}',
+                        last_name=f'Фамилия{number}',
+                        password=password,
+                    )
+                    for number in numbers
+                ]))
+            recipe_ids = []
+            for numbers in self.chunks(range(options['recipes'])):
+                recipe_ingredients = []
+                recipes = []
+                for number in numbers:
+                    chosen = rng.sample(
+                        ingredient_ids, options['ingredients_per_recipe'])
+                    recipe_ingredients.append(chosen)
+                    names = [ingredient_names[pk] for pk in chosen]
+                    recipes.append(Recipe(
+                        author_id=rng.choice(user_ids),
+                        name=f'{names[0].capitalize()} №{number}',
+                        text='Смешать: ' + ', '.join(names) + '.',
+                        cooking_time=rng.randint(5, 180),
+                    ))
+                recipes = self.bulk_create(Recipe, recipes)
+                self.bulk_create(IngredientRecipe, [
+                    IngredientRecipe(
+                        recipe=recipe, ingredient_id=ingredient_id,
+                        amount=rng.randint(1, 500))
+                    for recipe, chosen in zip(recipes, recipe_ingredients)
+                    for ingredient_id in chosen
+                ])
+                self.bulk_create(Recipe.tags.through, [
+                    Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+                    for recipe in recipes
+                    for tag_id in rng.sample(
+                        tag_ids,
+                        min(options['tags_per_recipe'], len(tag_ids)))
+                ])
+                chunk = Recipe.objects.filter(
+                    pk__in=[recipe.id for recipe in recipes])
+                chunk.update_search_vector()
+                rebuild_cards(chunk)
+                recipe_ids.extend(recipe.id for recipe in recipes)
+            for users in self.chunks(user_ids):
+                for model, per_user in (
+                    (Favorite, options['favorites']),
+                    (ShoppingCart, options['carts']),
+                ):
+                    self.bulk_create(model, [
+                        model(user_id=user_id, recipe_id=recipe_id)
+                        for user_id in users
+                        for recipe_id in rng.sample(
+                            recipe_ids, min(per_user, len(recipe_ids)))
+                    ])
+                subscriptions = []
+                for user_id in users:
+                    authors = rng.sample(
+                        user_ids,
+                        min(options['subscriptions'] + 1, len(user_ids)))
+                    authors = [
+                        author for author in authors if author != user_id]
+                    subscriptions.extend(
+                        Subscription(user_id=user_id, author_id=author_id)
+                        for author_id in authors[:options['subscriptions']]
+                    )
+                self.bulk_create(Subscription, subscriptions)
+            call_command('rebuild_counters', stdout=self.stdout)
+        bump_generation(
+            GENERATION_TAGS, GENERATION_INGREDIENTS, GENERATION_RECIPES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено строк {deleted}, создано пользователей '
+            f'{len(user_ids)}, рецептов {len(recipe_ids)} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,79 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:27
+
+from django.db import migrations, models
+
+CARD_VERSION = 1
+BATCH_SIZE = 500
+
+
+def build_card(recipe):
+    author = recipe.author
+    return {
+        'version': CARD_VERSION,
+        'id': recipe.id,
+        'tags': [
+            (tag.id, tag.name, tag.slug) for tag in recipe.tags.all()
+        ],
+        'author': {
+            'id': author.id,
+            'email': author.email,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'avatar': author.avatar.name or None,
+            'avatar_variants': author.avatar_variants,
+        },
+        'ingredients': [
+            (
+                item.ingredient.id,
+                item.ingredient.name,
+                item.ingredient.measurement_unit,
+                item.amount,
+            )
+            for item in recipe.amount_ingredients.all()
+        ],
+        'name': recipe.name,
+        'image': recipe.image.name or None,
+        'image_variants': recipe.image_variants,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+    }
+
+
+def fill_cards(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        recipes = list(Recipe.objects.filter(
+            pk__in=ids[start:start + BATCH_SIZE]
+        ).select_related('author').prefetch_related(
+            'tags',
+            models.Prefetch(
+                'amount_ingredients',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient').order_by('pk')
+            ),
+        ))
+        for recipe in recipes:
+            recipe.card = build_card(recipe)
+        Recipe.objects.bulk_update(recipes, ('card',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_image_variants'),
+        ('users', '0003_user_avatar_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='card',
+            field=models.JSONField(default=dict, editable=False, verbose_name='Карточка рецепта'),
+        ),
+        migrations.RunPython(
+            fill_cards, migrations.RunPython.noop
+        ),
+    ]
@@ -1,5 +1,10 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
 from users.models import User
 from recipes.validators import validate_slugtag
@@ -12,7 +17,8 @@ from foodgram.constants import (
     MAX_LENGTH_SLUG_NAME,
     MAX_LENGTH_RECIPE_NAME,
     COOKING_TIME_MIN,
-    INGREDIENT_AMOUNT_MIN
+    INGREDIENT_AMOUNT_MIN,
+    SEARCH_CONFIG,
 )
 
 
@@ -41,6 +47,13 @@ class Ingredient(models.Model):
                 fields=('name', 'measurement_unit',),
                 name='unique_ingredient_name_and_measurement'),
         )
+        indexes = (
+            GinIndex(
+                fields=('name',),
+                name='ingredient_name_trgm_idx',
+                opclasses=('gin_trgm_ops',)
+            ),
+        )
 
     def __str__(self) -> str:
         return f'{self.name} - {self.measurement_unit}'
@@ -70,6 +83,79 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """ QuerySet рецептов для выдачи списком и по одному. """
+
+    def with_related(self):
+        """ Подгружает автора, теги и ингредиенты фиксированным
+        числом запросов, как нужно для сборки карточек.
+        """
+        return self.select_related('author').prefetch_related(
+            'tags',
+            models.Prefetch(
+                'amount_ingredients',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient').order_by('pk')
+            ),
+        )
+
+    def with_cards(self, user):
+        """ Готовые карточки рецептов и флаги пользователя
+        is_favorited, is_in_shopping_cart и is_subscribed одним
+        запросом без загрузки тегов, ингредиентов и авторов.
+        """
+        if not user.is_authenticated:
+            return self.only('id', 'card').annotate(
+                is_favorited=models.Value(False),
+                is_in_shopping_cart=models.Value(False),
+                is_subscribed=models.Value(False),
+            )
+        return self.only('id', 'card').annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk'))),
+            is_subscribed=models.Exists(Subscription.objects.filter(
+                user=user, author=models.OuterRef('author_id'))),
+        )
+
+    def top_per_author(self, author_ids, limit):
+        """ Последние limit рецептов каждого из авторов одним запросом
+        с оконной функцией ROW_NUMBER() OVER (PARTITION BY author_id).
+        """
+        ranked = self.filter(author_id__in=author_ids).annotate(
+            row_number=models.Window(
+                RowNumber(),
+                partition_by=models.F('author_id'),
+                order_by=models.F('id').desc(),
+            )
+        ).values('id', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(id__in=RawSQL(
+            f'SELECT id FROM ({sql}) AS ranked WHERE row_number <= %s',
+            (*params, limit)
+        ))
+
+    def update_search_vector(self):
+        """ Пересчитывает поисковый вектор рецептов по названию,
+        названиям ингредиентов и описанию.
+        """
+        ingredient_names = IngredientRecipe.objects.filter(
+            recipe=models.OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+        return self.update(search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(
+                models.Subquery(ingredient_names),
+                weight='B',
+                config=SEARCH_CONFIG
+            )
+            + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+        ))
+
+
 class Recipe(models.Model):
     """ Модель Recipe. """
 
@@ -83,6 +169,11 @@ class Recipe(models.Model):
         null=True,
         default=None
     )
+    image_variants = models.JSONField(
+        'Варианты изображения',
+        default=dict,
+        editable=False
+    )
     text = models.TextField('Описание',)
     author = models.ForeignKey(
         User,
@@ -103,12 +194,44 @@ class Recipe(models.Model):
         validators=(MinValueValidator(
             COOKING_TIME_MIN, message=MESSAGE_COOKING_TIME),)
     )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    cart_count = models.PositiveIntegerField(
+        'Добавлений в корзину',
+        default=0,
+        editable=False
+    )
+    card = models.JSONField(
+        'Карточка рецепта',
+        default=dict,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-id',)
         default_related_name = 'recipes'
+        indexes = (
+            models.Index(
+                fields=('author', '-id'),
+                name='recipe_author_id_idx'
+            ),
+            GinIndex(
+                fields=('search_vector',),
+                name='recipe_search_vector_idx'
+            ),
+        )
 
     def __str__(self) -> str:
         return self.name
@@ -215,6 +338,13 @@ class ShoppingCart(models.Model):
         return f'{self.user} :: {self.recipe}'
 
 
+# Счетчики рецепта, которые сигналы поддерживают для каждой модели связи.
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'cart_count',
+}
+
+
 class Subscription(models.Model):
     """ Подписки пользователей друг на друга. """
 
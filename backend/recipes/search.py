@@ -0,0 +1,102 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection, transaction
+
+from foodgram.constants import (
+    INGREDIENT_FUZZY_LIMIT,
+    INGREDIENT_FUZZY_THRESHOLD,
+    INGREDIENT_INDEX_TTL,
+)
+from recipes.models import Ingredient
+
+IngredientEntry = namedtuple(
+    'IngredientEntry', ('id', 'name', 'measurement_unit'))
+
+
+def normalize(value):
+    """ Приводит строку к виду для сравнения без учета регистра. """
+    return value.casefold().replace('ё', 'е')
+
+
+class IndexSnapshot:
+    """ Снимок таблицы ингредиентов, из которого строится поиск. """
+
+    def __init__(self, keys, entries, expires):
+        self.keys = keys
+        self.entries = entries
+        self.expires = expires
+
+
+class IngredientIndex:
+    """ Индекс ингредиентов в памяти процесса для автодополнения.
+    Отсортированный список нормализованных названий, поиск по префиксу
+    через bisect, затем совпадения по подстроке.
+    """
+
+    def __init__(self, ttl=INGREDIENT_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _build(self):
+        rows = sorted(
+            ((normalize(name), unit, pk), IngredientEntry(pk, name, unit))
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit')
+        )
+        return IndexSnapshot(
+            keys=[key for (key, *_), _ in rows],
+            entries=[entry for _, entry in rows],
+            expires=time.monotonic() + self.ttl,
+        )
+
+    def _load(self):
+        data = self._data
+        if data is None or data.expires < time.monotonic():
+            with self._lock:
+                if self._data is data:
+                    self._data = self._build()
+                data = self._data
+        return data
+
+    def invalidate(self):
+        """ Сбрасывает индекс, он будет перестроен при следующем поиске. """
+        self._data = None
+
+    def search(self, query):
+        """ Ингредиенты, начинающиеся с query, затем содержащие query. """
+        data = self._load()
+        keys, entries = data.keys, data.entries
+        query = normalize(query)
+        if not query:
+            return list(entries)
+        start = bisect_left(keys, query)
+        end = bisect_right(keys, query + chr(0x10FFFF), start)
+        return entries[start:end] + [
+            entry for key, entry in zip(keys, entries)
+            if query in key and not key.startswith(query)
+        ]
+
+
+ingredient_index = IngredientIndex()
+
+
+def fuzzy_search(query):
+    """ Нечеткий поиск ингредиентов через pg_trgm и GIN-индекс.
+    Порог сходства задается через SET LOCAL, чтобы оператор %
+    продолжал использовать индекс.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'SET LOCAL pg_trgm.similarity_threshold = %s',
+            (INGREDIENT_FUZZY_THRESHOLD,)
+        )
+        return list(Ingredient.objects.filter(
+            name__trigram_similar=query
+        ).annotate(
+            similarity=TrigramSimilarity('name', query)
+        ).order_by('-similarity', 'name')[:INGREDIENT_FUZZY_LIMIT])
@@ -0,0 +1,255 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from foodgram.cache import bump_generation
+from foodgram.constants import (
+    GENERATION_INGREDIENTS,
+    GENERATION_RECIPES,
+    GENERATION_TAGS,
+)
+from foodgram.images import schedule_variants
+from recipes.cards import rebuild_cards
+from recipes.models import (
+    RECIPE_COUNTERS,
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from recipes.search import ingredient_index
+from users.authentication import invalidate_user_tokens
+from users.models import User
+
+
+class OnCommitBatch:
+    """ Действие после коммита над значениями, накопленными
+    за транзакцию. Значения копятся в одном экземпляре на поток
+    и базу данных, а колбэк выполняет работу один раз и снимает
+    экземпляр из реестра; остальные колбэки той же транзакции
+    находят реестр пустым. Значения из откаченной транзакции
+    обрабатываются вместе со следующей - действия идемпотентны.
+    """
+
+    registry = threading.local()
+
+    def __init__(self, using):
+        self.using = using
+        self.items = set()
+
+    @classmethod
+    def get_batches(cls):
+        if not hasattr(cls.registry, 'batches'):
+            cls.registry.batches = {}
+        return cls.registry.batches
+
+    @classmethod
+    def schedule(cls, *items, using=DEFAULT_DB_ALIAS):
+        batches = cls.get_batches()
+        batch = batches.get((using, cls))
+        if batch is None:
+            batch = batches[(using, cls)] = cls(using)
+        batch.items.update(items)
+        transaction.on_commit(batch.run, using=using)
+
+    def run(self):
+        batches = self.get_batches()
+        if batches.get((self.using, type(self))) is not self:
+            return
+        del batches[(self.using, type(self))]
+        self()
+
+
+class GenerationBump(OnCommitBatch):
+    """ Сдвиг поколений кэша после коммита. """
+
+    def __call__(self):
+        bump_generation(*self.items)
+
+
+class SearchVectorUpdate(OnCommitBatch):
+    """ Пересчет поисковых векторов затронутых рецептов после коммита. """
+
+    def __call__(self):
+        Recipe.objects.filter(pk__in=self.items).update_search_vector()
+
+
+class IngredientSearchVectorUpdate(OnCommitBatch):
+    """ Пересчет поисковых векторов рецептов с переименованными
+    ингредиентами: одно обновление на транзакцию.
+    """
+
+    def __call__(self):
+        Recipe.objects.filter(
+            ingredients__in=self.items).update_search_vector()
+
+
+class CardUpdate(OnCommitBatch):
+    """ Пересборка карточек затронутых рецептов после коммита.
+    Поколение рецептов сдвигается после пересборки, чтобы ответы,
+    собранные из старых карточек, не остались в кэше.
+    """
+
+    def __call__(self):
+        rebuild_cards(Recipe.objects.filter(pk__in=self.items))
+        bump_generation(GENERATION_RECIPES)
+
+
+def bump_on_commit(*names):
+    GenerationBump.schedule(*names)
+
+
+def shift_recipe_counter(model, recipe_id, delta):
+    field = RECIPE_COUNTERS[model]
+    Recipe.objects.filter(pk=recipe_id).update(**{field: F(field) + delta})
+
+
+def shift_recipes_count(author_id, delta):
+    User.objects.filter(pk=author_id).update(
+        recipes_count=F('recipes_count') + delta)
+
+
+# Счетчики меняются в той же транзакции, что и строки, при любом
+# способе записи: через API, админку, каскадное удаление. bulk_create
+# сигналов не отправляет, счетчики тогда обновляет вызывающий код.
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, raw=False,
+                             **kwargs):
+    if created and not raw:
+        shift_recipe_counter(sender, instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    shift_recipe_counter(sender, instance.recipe_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shift_recipes_count(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    shift_recipes_count(instance.author_id, -1)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+    bump_on_commit(GENERATION_INGREDIENTS, GENERATION_RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    bump_on_commit(GENERATION_TAGS, GENERATION_RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes(sender, **kwargs):
+    bump_on_commit(GENERATION_RECIPES)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_card(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'search_vector', 'card'}:
+        return
+    CardUpdate.schedule(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def update_ingredients_card(sender, instance, **kwargs):
+    CardUpdate.schedule(instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_tags_cards(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        CardUpdate.schedule(instance.pk)
+    elif action == 'pre_clear':
+        CardUpdate.schedule(*instance.recipes.values_list('pk', flat=True))
+    elif pk_set:
+        CardUpdate.schedule(*pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def update_tag_cards(sender, instance, created=False, **kwargs):
+    if not created:
+        CardUpdate.schedule(*instance.recipes.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_cards(sender, instance, created, **kwargs):
+    if not created:
+        CardUpdate.schedule(*Recipe.objects.filter(
+            ingredients=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+def update_author_cards(sender, instance, created, update_fields=None,
+                        **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    CardUpdate.schedule(*instance.recipes.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, update_fields=None,
+                                **kwargs):
+    if update_fields and 'search_vector' in update_fields:
+        return
+    SearchVectorUpdate.schedule(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def update_ingredients_search_vector(sender, instance, **kwargs):
+    SearchVectorUpdate.schedule(instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_renamed_ingredient_search_vector(sender, instance, created,
+                                            **kwargs):
+    if not created:
+        IngredientSearchVectorUpdate.schedule(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, **kwargs):
+    def on_done():
+        rebuild_cards(Recipe.objects.filter(pk=instance.pk))
+        bump_generation(GENERATION_RECIPES)
+
+    schedule_variants(instance, 'image', 'image_variants', on_done)
+
+
+@receiver(post_save, sender=User)
+def process_avatar(sender, instance, **kwargs):
+    def on_done():
+        rebuild_cards(instance.recipes.all())
+        bump_generation(GENERATION_RECIPES)
+        invalidate_user_tokens(instance.pk)
+
+    schedule_variants(instance, 'avatar', 'avatar_variants', on_done)
+
+
+@receiver(post_save, sender=User)
+def invalidate_authors(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_on_commit(GENERATION_RECIPES)
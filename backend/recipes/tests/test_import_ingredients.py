@@ -0,0 +1,91 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from foodgram.cache import get_generation
+from foodgram.constants import GENERATION_INGREDIENTS
+from recipes.management.commands.import_ingredients import iter_json_array
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+INGREDIENTS = [
+    {'name': 'молоко', 'measurement_unit': 'мл'},
+    {'name': 'мука', 'measurement_unit': 'г'},
+    {'name': 'молоко', 'measurement_unit': 'мл'},
+]
+
+
+class IterJsonArrayTest(TestCase):
+
+    def test_chunks(self):
+        text = json.dumps([*INGREDIENTS, 12345, [1, {'a': 2}]], indent=2)
+        for chunk_size in (1, 2, 7, 1024):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(
+                    list(iter_json_array(io.StringIO(text), chunk_size)),
+                    json.loads(text))
+
+    def test_invalid(self):
+        for text in ('', '{}', '[1,', '[1 2]', '[1,]', '[{"name": "мука"'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                list(iter_json_array(io.StringIO(text), 2))
+
+
+class ImportIngredientsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write(self, name, content):
+        path = self.directory / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def test_import(self):
+        json_path = self.write('ingredients.json', json.dumps(INGREDIENTS))
+        csv_path = self.write('ingredients.csv', 'мука,г\nяйца,шт\n')
+        call_command(
+            'import_ingredients', json_path, csv_path, '--batch-size', '1',
+            stdout=io.StringIO())
+        self.assertEqual(
+            sorted(Ingredient.objects.values_list(
+                'name', 'measurement_unit')),
+            [('молоко', 'мл'), ('мука', 'г'), ('яйца', 'шт')])
+
+    def test_invalidates_index_and_generation(self):
+        generation, _ = get_generation(GENERATION_INGREDIENTS)
+        self.assertEqual(ingredient_index.search('мол'), [])
+        call_command(
+            'import_ingredients',
+            self.write('ingredients.json', json.dumps(INGREDIENTS)),
+            stdout=io.StringIO())
+        self.assertNotEqual(
+            get_generation(GENERATION_INGREDIENTS)[0], generation)
+        self.assertEqual(
+            [entry.name for entry in ingredient_index.search('мол')],
+            ['молоко'])
+
+    def test_errors_raise_command_error(self):
+        for name, content in (
+            ('broken.json', '[{"name": "мука"'),
+            ('keys.json', '[{"title": "мука"}]'),
+            ('columns.csv', 'мука\n'),
+            ('ingredients.xml', '<ingredients/>'),
+        ):
+            with self.subTest(name=name), self.assertRaises(CommandError):
+                call_command(
+                    'import_ingredients', self.write(name, content),
+                    stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_ingredients', self.directory / 'missing.json',
+                stdout=io.StringIO())
+        self.assertFalse(Ingredient.objects.exists())
@@ -0,0 +1,49 @@
+from django.db import connection, transaction
+from django.test import TestCase
+
+from recipes.models import Ingredient
+from recipes.search import fuzzy_search
+
+
+def has_pg_trgm():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+class FuzzySearchTest(TestCase):
+    """ Нечеткий поиск ингредиентов через pg_trgm. """
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create([
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('молоко', 'сгущенное молоко', 'мука', 'соль')
+        ])
+
+    def setUp(self):
+        if not has_pg_trgm():
+            self.skipTest('Нужен PostgreSQL с расширением pg_trgm.')
+
+    def test_typo(self):
+        names = [ingredient.name for ingredient in fuzzy_search('малоко')]
+        self.assertEqual(names[0], 'молоко')
+        self.assertIn('сгущенное молоко', names)
+        self.assertNotIn('соль', names)
+
+    def test_no_match(self):
+        self.assertEqual(fuzzy_search('шоколад'), [])
+
+    def test_api_falls_back_to_fuzzy(self):
+        response = self.client.get('/api/ingredients/', {'name': 'малоко'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], 'молоко')
+
+    def test_uses_trigram_index(self):
+        queryset = Ingredient.objects.filter(name__trigram_similar='малоко')
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        self.assertIn('ingredient_name_trgm_idx', plan)
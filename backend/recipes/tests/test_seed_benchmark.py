@@ -0,0 +1,62 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from foodgram.constants import BENCHMARK_EMAIL_DOMAIN
+from recipes.models import Favorite, Ingredient, Recipe, Subscription
+from users.models import User
+
+
+class SeedBenchmarkTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create([
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(4)
+        ])
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='x')
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Блины', text='...', cooking_time=10)
+
+    def seed(self, *args):
+        call_command(
+            'seed_benchmark', '--users', '5', '--recipes', '7',
+            '--ingredients-per-recipe', '2', '--favorites', '2',
+            '--carts', '1', '--subscriptions', '2', '--batch-size', '3',
+            *args, stdout=io.StringIO())
+
+    def bench_users(self):
+        return User.objects.filter(
+            email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}')
+
+    def test_seed_in_chunks(self):
+        self.seed()
+        self.assertEqual(self.bench_users().count(), 5)
+        recipes = Recipe.objects.filter(author__in=self.bench_users())
+        self.assertEqual(recipes.count(), 7)
+        self.assertFalse(recipes.filter(card={}).exists())
+        self.assertFalse(recipes.filter(search_vector=None).exists())
+        self.assertEqual(
+            Favorite.objects.filter(user__in=self.bench_users()).count(), 10)
+        self.assertEqual(Subscription.objects.count(), 10)
+        self.assertEqual(
+            sum(user.recipes_count for user in self.bench_users()), 7)
+
+    def test_clear_removes_related_rows(self):
+        self.seed()
+        bench_recipe = Recipe.objects.exclude(pk=self.recipe.pk).first()
+        Favorite.objects.create(user=self.user, recipe=bench_recipe)
+        Favorite.objects.create(
+            user=self.bench_users().first(), recipe=self.recipe)
+        Subscription.objects.create(
+            user=self.user, author=bench_recipe.author)
+        self.seed('--clear')
+        self.assertFalse(self.bench_users().exists())
+        self.assertEqual(list(Recipe.objects.all()), [self.recipe])
+        self.assertFalse(Favorite.objects.exists())
+        self.assertFalse(Subscription.objects.exists())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
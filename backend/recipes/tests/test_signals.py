@@ -0,0 +1,76 @@
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from recipes.signals import OnCommitBatch
+from users.models import User
+
+
+class Recorder(OnCommitBatch):
+    calls = []
+
+    def __call__(self):
+        self.calls.append(self.items)
+
+
+class OnCommitBatchTest(TestCase):
+
+    def setUp(self):
+        Recorder.calls = []
+
+    def test_one_run_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Recorder.schedule(1)
+            Recorder.schedule(2, 3)
+        self.assertEqual(Recorder.calls, [{1, 2, 3}])
+
+    def test_next_transaction_gets_new_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Recorder.schedule(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Recorder.schedule(2)
+        self.assertEqual(Recorder.calls, [{1}, {2}])
+
+    def test_rolled_back_items_run_with_next_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Recorder.schedule(1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            Recorder.schedule(2)
+        self.assertEqual(Recorder.calls, [{1, 2}])
+
+
+class IngredientRenameTest(TestCase):
+
+    def test_renames_share_one_update(self):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='x')
+        salt, sugar = Ingredient.objects.bulk_create([
+            Ingredient(name='соль', measurement_unit='г'),
+            Ingredient(name='сахар', measurement_unit='г'),
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                author=author, name='Блины', text='...', cooking_time=10)
+            IngredientRecipe.objects.bulk_create([
+                IngredientRecipe(recipe=recipe, ingredient=salt, amount=1),
+                IngredientRecipe(recipe=recipe, ingredient=sugar, amount=2),
+            ])
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                salt.name = 'морская соль'
+                salt.save()
+                sugar.name = 'тростниковый сахар'
+                sugar.save()
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "recipes_recipe"')
+            and '"search_vector"' in query['sql']
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertTrue(Recipe.objects.filter(
+            pk=recipe.pk, search_vector='тростников').exists())
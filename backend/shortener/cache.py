@@ -0,0 +1,51 @@
+from django.core.cache import caches
+
+from foodgram.cache import LocalTTLCache
+from foodgram.constants import (
+    SHORT_LINK_CACHE_ALIAS,
+    SHORT_LINK_CACHE_TTL,
+    SHORT_LINK_LOCAL_CACHE_SIZE,
+    SHORT_LINK_LOCAL_CACHE_TTL,
+    SHORT_LINK_MISSING_TTL,
+)
+from .models import LinkMapped
+
+# Отметка о несуществующем хэше; original_url пустым не бывает.
+MISSING = ''
+
+local_cache = LocalTTLCache(
+    SHORT_LINK_LOCAL_CACHE_SIZE, SHORT_LINK_LOCAL_CACHE_TTL)
+
+
+def get_cache_key(url_hash):
+    return f'shortener:{url_hash}'
+
+
+def resolve_url(url_hash):
+    """ Возвращает исходную ссылку по хэшу или None.
+    Сначала смотрит в локальный кэш процесса, затем в общий кэш,
+    и только потом в базу данных.
+    """
+    key = get_cache_key(url_hash)
+    original_url = local_cache.get(key)
+    if original_url is None:
+        shared_cache = caches[SHORT_LINK_CACHE_ALIAS]
+        original_url = shared_cache.get(key)
+        if original_url is None:
+            original_url = LinkMapped.objects.filter(
+                url_hash=url_hash
+            ).values_list('original_url', flat=True).first() or MISSING
+            shared_cache.set(
+                key,
+                original_url,
+                SHORT_LINK_CACHE_TTL if original_url
+                else SHORT_LINK_MISSING_TTL
+            )
+        local_cache.set(key, original_url)
+    return original_url or None
+
+
+def invalidate(url_hash):
+    key = get_cache_key(url_hash)
+    local_cache.delete(key)
+    caches[SHORT_LINK_CACHE_ALIAS].delete(key)
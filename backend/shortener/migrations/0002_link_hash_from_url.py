@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='linkmapped',
+            name='original_url',
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name='linkmapped',
+            name='url_hash',
+            field=models.CharField(max_length=15, unique=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0002_link_hash_from_url'),
+    ]
+
+    operations = [
+        # Для каждой ссылки остается самая ранняя запись: ее же
+        # возвращал create_link, более поздние дубли удаляются.
+        migrations.RunSQL(
+            'DELETE FROM shortener_linkmapped AS duplicate '
+            'USING shortener_linkmapped AS kept '
+            'WHERE duplicate.original_url = kept.original_url '
+            'AND duplicate.id > kept.id;',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='linkmapped',
+            name='original_url',
+            field=models.CharField(max_length=256, unique=True),
+        ),
+    ]
@@ -1,18 +1,26 @@
+import hashlib
+import hmac
 import string
 from random import choice, randint
 
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 
 from foodgram.constants import (
     MAX_HASH_GEN,
     MAX_HASH_LENGTH,
     MIN_HASH_GEN,
+    SHORT_LINK_HASH_LENGTH,
     URL_MAX_LENGTH,
 )
 
+BASE62_ALPHABET = string.digits + string.ascii_letters
+
 
 def generate_hash() -> str:
-    """Генерирует случайную строку"""
+    """Генерирует случайную строку.
+    Используется в ранних миграциях.
+    """
 
     return ''.join(
         choice(string.ascii_letters + string.digits)
@@ -20,13 +28,55 @@ def generate_hash() -> str:
     )
 
 
+def make_url_hash(original_url: str) -> str:
+    """Детерминированный хэш ссылки: HMAC-SHA256 от SECRET_KEY в base62.
+    Одна и та же ссылка всегда получает один и тот же хэш.
+    """
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), original_url.encode(), hashlib.sha256
+    ).digest()
+    number = int.from_bytes(digest, 'big')
+    chars = []
+    for _ in range(SHORT_LINK_HASH_LENGTH):
+        number, index = divmod(number, len(BASE62_ALPHABET))
+        chars.append(BASE62_ALPHABET[index])
+    return ''.join(chars)
+
+
+class LinkMappedQuerySet(models.QuerySet):
+
+    def create_link(self, original_url):
+        """Возвращает короткую ссылку на original_url, создавая ее
+        при необходимости. Поиск идет по уникальному original_url, поэтому
+        ссылки со случайным хэшем и хэшем от прежнего SECRET_KEY не
+        дублируются. Ссылка создается через save(), чтобы сработал
+        post_save.
+        """
+        links = self.filter(original_url=original_url)
+        link = links.first()
+        if link is not None:
+            return link
+        try:
+            with transaction.atomic():
+                return self.create(
+                    original_url=original_url,
+                    url_hash=make_url_hash(original_url)
+                )
+        except IntegrityError:
+            # Ту же ссылку одновременно создал другой запрос.
+            link = links.first()
+            if link is None:
+                raise
+            return link
+
+
 class LinkMapped(models.Model):
     """Модель коротких ссылок. """
 
-    url_hash = models.CharField(
-        max_length=MAX_HASH_LENGTH, default=generate_hash, unique=True
-    )
-    original_url = models.CharField(max_length=URL_MAX_LENGTH)
+    url_hash = models.CharField(max_length=MAX_HASH_LENGTH, unique=True)
+    original_url = models.CharField(max_length=URL_MAX_LENGTH, unique=True)
+
+    objects = LinkMappedQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Ссылка'
@@ -34,3 +84,8 @@ class LinkMapped(models.Model):
 
     def __str__(self):
         return f'{self.original_url} -> {self.url_hash}'
+
+    def save(self, *args, **kwargs):
+        if not self.url_hash:
+            self.url_hash = make_url_hash(self.original_url)
+        super().save(*args, **kwargs)
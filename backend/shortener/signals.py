@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .models import LinkMapped
+
+
+@receiver((post_save, post_delete), sender=LinkMapped)
+def invalidate_link_cache(sender, instance, **kwargs):
+    invalidate(instance.url_hash)
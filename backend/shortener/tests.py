@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shortener.cache import local_cache, resolve_url
+from recipes.models import Recipe
+from shortener.models import LinkMapped, make_url_hash
+from users.models import User
+
+URL = 'http://testserver/recipes/1'
+
+
+class CreateLinkTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_same_url_same_link(self):
+        first = LinkMapped.objects.create_link(URL)
+        second = LinkMapped.objects.create_link(URL)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.url_hash, make_url_hash(URL))
+        self.assertEqual(LinkMapped.objects.count(), 1)
+
+    def test_existing_random_hash_is_reused(self):
+        legacy = LinkMapped.objects.create(original_url=URL, url_hash='abc123')
+        self.assertEqual(LinkMapped.objects.create_link(URL).pk, legacy.pk)
+        self.assertEqual(LinkMapped.objects.count(), 1)
+
+    def test_secret_key_rotation(self):
+        link = LinkMapped.objects.create_link(URL)
+        with override_settings(SECRET_KEY='rotated-secret-key'):
+            self.assertNotEqual(make_url_hash(URL), link.url_hash)
+            self.assertEqual(LinkMapped.objects.create_link(URL).pk, link.pk)
+        self.assertEqual(LinkMapped.objects.count(), 1)
+
+    def test_original_url_is_unique(self):
+        LinkMapped.objects.create_link(URL)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LinkMapped.objects.create(original_url=URL, url_hash='abc123')
+
+    def test_concurrent_create_reselects(self):
+        legacy = LinkMapped.objects.create(original_url=URL, url_hash='abc123')
+        queryset = LinkMapped.objects.filter(original_url=URL)
+        with mock.patch.object(
+            type(queryset), 'first', side_effect=[None, legacy]
+        ):
+            link = LinkMapped.objects.create_link(URL)
+        self.assertEqual(link.pk, legacy.pk)
+        self.assertEqual(LinkMapped.objects.count(), 1)
+
+    def test_created_link_invalidates_missing_mark(self):
+        url_hash = make_url_hash(URL)
+        self.assertIsNone(resolve_url(url_hash))
+        LinkMapped.objects.create_link(URL)
+        self.assertEqual(resolve_url(url_hash), URL)
+
+
+class LinkViewsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.client = APIClient()
+
+    def test_get_link_and_redirect(self):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='x')
+        recipe = Recipe.objects.create(
+            author=author, name='Блины', text='...', cooking_time=10)
+        url = reverse('api:recipe-get-link', args=[recipe.id])
+        first = self.client.get(url).data['short-link']
+        second = self.client.get(url).data['short-link']
+        self.assertEqual(first, second)
+        self.assertEqual(LinkMapped.objects.count(), 1)
+        response = self.client.get(first)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            response['Location'],
+            'http://testserver' + reverse(
+                'api:recipe-detail', args=[recipe.id]))
+
+    def test_get_link_checks_recipe_by_pk(self):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='x')
+        recipe = Recipe.objects.create(
+            author=author, name='Блины', text='...', cooking_time=10)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse('api:recipe-get-link', args=[recipe.id]))
+        self.assertEqual(response.status_code, 200)
+        lookup = context.captured_queries[0]['sql']
+        self.assertIn('FROM "recipes_recipe"', lookup)
+        self.assertNotIn('"recipes_recipe"."text"', lookup)
+        response = self.client.get(
+            reverse('api:recipe-get-link', args=[recipe.id + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_hash(self):
+        response = self.client.get(
+            reverse('shortener:load_url', args=['missing']))
+        self.assertEqual(response.status_code, 404)
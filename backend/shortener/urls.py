@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import path
 
+from foodgram.async_views import async_reads
 from . import views
 
 
@@ -8,3 +10,6 @@ app_name = 'shortener'
 urlpatterns = [
     path('s/<str:url_hash>/', views.load_url, name='load_url'),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = async_reads(urlpatterns, ('load_url',))
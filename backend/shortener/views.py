@@ -1,14 +1,18 @@
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control
 from django.views.decorators.http import require_GET
 
-from .models import LinkMapped
+from foodgram.constants import SHORT_LINK_MAX_AGE
+from .cache import resolve_url
 
 
 @require_GET
 def load_url(request, url_hash: str) -> HttpResponse:
     """Перенаправление с короткой ссылки на обычную"""
-    original_url = get_object_or_404(
-        LinkMapped, url_hash=url_hash
-    ).original_url
-    return redirect(original_url)
+    original_url = resolve_url(url_hash)
+    if original_url is None:
+        raise Http404
+    response = redirect(original_url)
+    patch_cache_control(response, public=True, max_age=SHORT_LINK_MAX_AGE)
+    return response
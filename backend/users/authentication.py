@@ -0,0 +1,81 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.fields.files import FieldFile
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram.cache import LocalTTLCache
+from foodgram.constants import (
+    AUTH_TOKEN_CACHE_TTL,
+    AUTH_TOKEN_LOCAL_CACHE_SIZE,
+    AUTH_TOKEN_LOCAL_CACHE_TTL,
+)
+from users.models import User
+
+# Хэш пароля не кладется в кэш, а счетчик меняется F-выражениями мимо
+# сигналов. Без этих полей пользователь из кэша получает их отложенными:
+# обращение к ним читает базу, а save() без update_fields их не пишет.
+DEFERRED_FIELDS = ('password', 'recipes_count')
+USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname not in DEFERRED_FIELDS
+)
+
+local_cache = LocalTTLCache(
+    AUTH_TOKEN_LOCAL_CACHE_SIZE, AUTH_TOKEN_LOCAL_CACHE_TTL)
+
+
+def get_cache_key(key):
+    """ В общем кэше хранится не сам токен, а его хэш. """
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def dump_user(user):
+    """ Значения полей USER_FIELDS в том виде, в каком их отдает база. """
+    values = (getattr(user, name) for name in USER_FIELDS)
+    return tuple(
+        value.name if isinstance(value, FieldFile) else value
+        for value in values
+    )
+
+
+def invalidate_tokens(*keys):
+    cache_keys = [get_cache_key(key) for key in keys]
+    for cache_key in cache_keys:
+        local_cache.delete(cache_key)
+    cache.delete_many(cache_keys)
+
+
+def invalidate_user_tokens(user_id):
+    invalidate_tokens(*Token.objects.filter(
+        user_id=user_id).values_list('key', flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """ Аутентификация по токену без запроса к базе на каждый вызов.
+    Данные пользователя ищутся в локальном LRU-кэше процесса, затем
+    в общем кэше. Сигналы сбрасывают запись при выходе, смене пароля
+    и любом изменении пользователя; в других процессах локальная
+    запись живет не дольше AUTH_TOKEN_LOCAL_CACHE_TTL секунд.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_cache_key(key)
+        cached = local_cache.get(cache_key)
+        if cached is None:
+            cached = cache.get(cache_key)
+            if cached is None:
+                user, token = super().authenticate_credentials(key)
+                cached = (token.created, dump_user(user))
+                cache.set(cache_key, cached, AUTH_TOKEN_CACHE_TTL)
+            local_cache.set(cache_key, cached)
+        created, values = cached
+        user = User.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+        return user, Token(key=key, user=user, created=created)
@@ -37,6 +37,16 @@ class User(AbstractUser):
         null=True,
         upload_to='media/avatars/',
     )
+    avatar_variants = models.JSONField(
+        'Варианты аватара',
+        default=dict,
+        editable=False
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (